@@ -43,6 +43,25 @@ sudo python /opt/bitnami/projects/quicksched/manage.py collectstatic --noinput;
 # change the owner of the django files to the apache wsgi mod daemon
 sudo chown -R daemon:daemon /opt/bitnami/projects/quicksched/
 
+# run the schedule generation worker as a service, generate requests from
+# the dashboard wait in a queue until it picks them up
+sudo tee /etc/systemd/system/quicksched-worker.service > /dev/null <<EOF
+[Unit]
+Description=QuickSched schedule generation worker
+After=network.target
+
+[Service]
+User=daemon
+WorkingDirectory=/opt/bitnami/projects/quicksched
+ExecStart=$(command -v python) /opt/bitnami/projects/quicksched/manage.py run_schedule_jobs
+Restart=always
+
+[Install]
+WantedBy=multi-user.target
+EOF
+sudo systemctl daemon-reload;
+sudo systemctl enable --now quicksched-worker;
+
 # restart apache
 sudo /opt/bitnami/ctlscript.sh restart apache
 
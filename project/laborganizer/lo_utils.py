@@ -2,8 +2,7 @@
 from .models import Semester, Lab
 from datetime import datetime
 from teachingassistant.models import TA
-from optimization.models import TemplateSchedule
-from django.core.exceptions import ObjectDoesNotExist
+from optimization.models import TemplateSchedule, score_matrix_for
 from io import StringIO
 import csv
 
@@ -51,13 +50,8 @@ def get_tas_by_semester(time, year):
     return tas
 
 def check_if_sem_exists(semester_dict):
-    time = semester_dict['time']
-    year = semester_dict['year']
-    try:
-        semester = Semester.objects.get(semester_time=time, year=year)
-    except ObjectDoesNotExist:
-        return False
-    return True
+    return Semester.objects.filter(semester_time=semester_dict['time'],
+                                   year=semester_dict['year']).exists()
 
 def get_labs_by_semester(time, year):
     """Get a list of all Labs assigned to a specific semester."""
@@ -73,19 +67,11 @@ def get_labs_by_semester(time, year):
 
 def get_most_recent_sched(time, year):
     """Get the most recent template schedule based on the given semester."""
-    # get the semester based on the time and year
-    semester = Semester.objects.get(semester_time=time,
-                                    year=year)
-    # grab all the schedule templates by semester
-    template_schedules = TemplateSchedule.objects.filter(semester=semester)
-
-    # find the one with the biggest version number
-    largest_version = 0
-    for schedule in template_schedules:
-        if schedule.version_number > largest_version:
-            largest_version = schedule.version_number
-    return TemplateSchedule.objects.get(semester=semester,
-                                        version_number=largest_version)
+    # the template with the biggest version number, read off the
+    # (semester, version number) index
+    return TemplateSchedule.objects.filter(
+        semester__semester_time=time,
+        semester__year=year).latest('version_number')
 
 
 def get_all_schedule_version_numbers(time, year):
@@ -94,27 +80,17 @@ def get_all_schedule_version_numbers(time, year):
 
     Based on time and year.
     """
-    # get the desired semester
-    semester = Semester.objects.get(semester_time=time,
-                                    year=year)
-
-    # get all template schedules based on semester
-    template_schedules = TemplateSchedule.objects.filter(semester=semester)
-
-    # get the version numbers of all template schedules
-    version_list = []
-    for schedule in template_schedules:
-        version_list.append(schedule.version_number)
-
-    return version_list
+    # get the version numbers of all template schedules of the semester
+    return list(TemplateSchedule.objects.filter(
+        semester__semester_time=time,
+        semester__year=year).order_by('version_number').values_list(
+            'version_number', flat=True))
 
 
 def get_template_schedule(time, year, version):
     """Get the template schedule based on semester and version number."""
-    # get the semester object
-    semester = Semester.objects.get(semester_time=time,
-                                    year=year)
-    return TemplateSchedule.objects.get(semester=semester,
+    return TemplateSchedule.objects.get(semester__semester_time=time,
+                                        semester__year=year,
                                         version_number=version)
 
 
@@ -202,11 +178,7 @@ def grade_deviation_score(score):
 
 def semester_exists(year, time):
     """Check if a semester already exists for a given time and year."""
-    try:
-        Semester.objects.get(semester_time=time, year=year)
-        return True
-    except Semester.DoesNotExist:
-        return False
+    return Semester.objects.filter(semester_time=time, year=year).exists()
 
 
 def lab_exists(course_id):
@@ -314,8 +286,9 @@ def validate_time(time):
 def add_labs(labs_list, semester):
     """Add labs to the database for prevalidated data to a given semester."""
     try:
+        new_labs = []
         for lab in labs_list:
-            Lab.objects.create(
+            new_lab = Lab(
                 class_name=lab[0],
                 subject=lab[1],
                 catalog_id=lab[2],
@@ -329,6 +302,10 @@ def add_labs(labs_list, semester):
                 end_time=lab[10],
                 semester=semester
             )
+            # bulk_create skips save(), so fill in the time slots here
+            new_lab.update_time_slots()
+            new_labs.append(new_lab)
+        Lab.objects.bulk_create(new_labs)
         # added all labs, return success
         return True
     except error as error:
@@ -419,12 +396,11 @@ def sort_semesters():
 
     return sorted_semesters
 
-def filter_out_unscored(ta_list):
-    tas = []
-    for ta in ta_list:
-        if len(ta.scores.all()) != 0:
-            tas.append(ta)
-    return tas
+def filter_out_unscored(ta_list, template_schedule):
+    matrix = score_matrix_for(template_schedule.id)
+    if matrix is None:
+        return []
+    return [ta for ta in ta_list if matrix.has_ta(ta.pk)]
 
 def filter_out_nolabs(ta_list, template_schedule):
     tas = []
@@ -0,0 +1,43 @@
+"""Recompute the stored time slots of every lab and class time."""
+from django.core.management.base import BaseCommand
+from django.db import DEFAULT_DB_ALIAS
+from laborganizer.models import Lab
+from laborganizer.time_slots import fill_time_slots
+from teachingassistant.models import ClassTime
+from optimization.optimization_utils import rescore_tas
+
+
+class Command(BaseCommand):
+    """Bring the time slots of rows written without save() up to date."""
+
+    help = ('Recompute the time slots of every lab and class time, for rows '
+            'written without save() such as fixtures, bulk creates and '
+            'updates. TA\'s whose class times changed are rescored.')
+
+    def add_arguments(self, parser):
+        """Define command line options."""
+        parser.add_argument('--database', default=DEFAULT_DB_ALIAS,
+                            help='database to update')
+
+    def handle(self, *args, **options):
+        """Recompute the labs and class times, then rescore their TA's."""
+        ta_ids = recompute_time_slots(options['database'], self.stdout,
+                                      options['verbosity'])
+        rescore_tas(ta_ids)
+
+
+def recompute_time_slots(using, stdout, verbosity=1):
+    """
+    Recompute the time slots of every lab and class time.
+
+    Return the TA's of the class times that changed, bulk_update sends no
+    signals so they are not rescored yet.
+    """
+    changed = {}
+    for model in (Lab, ClassTime):
+        changed[model] = fill_time_slots(model, using)
+        if verbosity > 0:
+            stdout.write(f'Updated the time slots of {len(changed[model])} '
+                         f'{model._meta.verbose_name_plural}')
+    return set(ClassTime.objects.using(using).filter(
+        pk__in=changed[ClassTime]).values_list('ta_id', flat=True))
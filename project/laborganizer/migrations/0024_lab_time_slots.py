@@ -0,0 +1,30 @@
+# Generated by Django 4.0.1 on 2026-10-18 18:31
+
+from django.db import migrations, models
+from laborganizer.time_slots import time_slot_mask
+
+
+def fill_time_slots(apps, schema_editor):
+    """Compute the time slot mask of every existing lab."""
+    Lab = apps.get_model('laborganizer', 'Lab')
+    labs = list(Lab.objects.all())
+    for lab in labs:
+        lab.time_slots = time_slot_mask(lab.days, lab.start_time,
+                                        lab.end_time)
+    Lab.objects.bulk_update(labs, ['time_slots'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laborganizer', '0023_alter_locache_semester_time_alter_locache_year'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lab',
+            name='time_slots',
+            field=models.BinaryField(default=bytes(180), editable=False, verbose_name='Time slots'),
+        ),
+        migrations.RunPython(fill_time_slots, migrations.RunPython.noop),
+    ]
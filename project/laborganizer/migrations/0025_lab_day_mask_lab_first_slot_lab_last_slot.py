@@ -0,0 +1,42 @@
+# Generated by Django 4.0.1 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from laborganizer.time_slots import time_slot_columns
+
+
+def fill_slot_columns(apps, schema_editor):
+    """Compute the day mask and slot range of every existing lab."""
+    Lab = apps.get_model('laborganizer', 'Lab')
+    labs = list(Lab.objects.all())
+    for lab in labs:
+        (_, lab.day_mask,
+         lab.first_slot, lab.last_slot) = time_slot_columns(
+            lab.days, lab.start_time, lab.end_time)
+    Lab.objects.bulk_update(labs, ['day_mask', 'first_slot', 'last_slot'],
+                            batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laborganizer', '0024_lab_time_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='lab',
+            name='day_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Day mask'),
+        ),
+        migrations.AddField(
+            model_name='lab',
+            name='first_slot',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='First time slot'),
+        ),
+        migrations.AddField(
+            model_name='lab',
+            name='last_slot',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Last time slot'),
+        ),
+        migrations.RunPython(fill_slot_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,73 @@
+# Generated by Django 4.0.1 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+def merge_duplicate_semesters(apps, schema_editor):
+    """
+    Merge semesters sharing a time and year into the oldest of them.
+
+    Labs, templates, jobs and TAs of a duplicate move to the semester kept,
+    its templates are numbered after the versions the kept semester has.
+    """
+    Semester = apps.get_model('laborganizer', 'Semester')
+    TemplateSchedule = apps.get_model('optimization', 'TemplateSchedule')
+    relations = Semester._meta.related_objects
+    kept = {}
+    for semester in Semester.objects.order_by('pk'):
+        key = (semester.semester_time, semester.year)
+        if key not in kept:
+            kept[key] = semester
+            continue
+        keep = kept[key]
+
+        # versions of the duplicate follow the versions already kept
+        last = TemplateSchedule.objects.filter(semester=keep).aggregate(
+            last=models.Max('version_number'))['last']
+        if last is not None:
+            templates = TemplateSchedule.objects.filter(
+                semester=semester).order_by('version_number', 'pk')
+            for last, template in enumerate(templates, start=last + 1):
+                template.version_number = last
+                template.save(update_fields=['version_number'])
+
+        for relation in relations:
+            if relation.many_to_many:
+                # drop the links the kept semester already has first
+                through = relation.through
+                source = relation.field.m2m_field_name()
+                target = relation.field.m2m_reverse_field_name()
+                linked = through.objects.filter(
+                    **{target: keep}).values(source)
+                through.objects.filter(
+                    **{target: semester, f'{source}__in': linked}).delete()
+                through.objects.filter(**{target: semester}).update(
+                    **{target: keep})
+            else:
+                relation.related_model.objects.filter(
+                    **{relation.field.name: semester}).update(
+                        **{relation.field.name: keep})
+        semester.delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laborganizer', '0025_lab_day_mask_lab_first_slot_lab_last_slot'),
+        # every model pointing at a semester, for the merge
+        ('optimization', '0020_scorematrix_digest'),
+        ('teachingassistant', '0031_classtime_day_mask_classtime_first_slot_and_more'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='lab',
+            index=models.Index(fields=['semester', 'catalog_id'], name='laborganize_semeste_2ac4b3_idx'),
+        ),
+        migrations.RunPython(merge_duplicate_semesters,
+                             migrations.RunPython.noop),
+        migrations.AddConstraint(
+            model_name='semester',
+            constraint=models.UniqueConstraint(fields=('semester_time', 'year'), name='unique_semester_time_year'),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.1 on 2026-10-19 10:30
+
+from django.db import migrations
+from laborganizer.time_slots import fill_time_slots
+
+
+def recompute_time_slots(apps, schema_editor):
+    """Recompute the time slots of rows written without save()."""
+    for model in (apps.get_model('laborganizer', 'Lab'),
+                  apps.get_model('teachingassistant', 'ClassTime')):
+        fill_time_slots(model, schema_editor.connection.alias)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laborganizer', '0026_lab_semester_catalog_index_and_more'),
+        ('teachingassistant', '0031_classtime_day_mask_classtime_first_slot_and_more'),
+    ]
+
+    operations = [
+        migrations.RunPython(recompute_time_slots, migrations.RunPython.noop),
+    ]
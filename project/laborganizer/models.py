@@ -1,6 +1,7 @@
 """Models relating to Lab Organizers."""
 from django.db import models
 from datetime import datetime, date
+from .time_slots import time_slot_columns, EMPTY_MASK
 
 
 class LOCache(models.Model):
@@ -70,6 +71,10 @@ class Semester(models.Model):
 
         verbose_name = 'Semester'
         verbose_name_plural = 'Semesters'
+        constraints = [
+            models.UniqueConstraint(fields=['semester_time', 'year'],
+                                    name='unique_semester_time_year'),
+        ]
 
     def __str__(self):
         """Human readable class name, for admin site."""
@@ -124,6 +129,9 @@ class Lab(models.Model):
 
         verbose_name = 'Lab'
         verbose_name_plural = 'Labs'
+        indexes = [
+            models.Index(fields=['semester', 'catalog_id']),
+        ]
 
     def __str__(self):
         """Human readable class name, for admin site."""
@@ -139,6 +147,17 @@ class Lab(models.Model):
         self.days = ' '.join(days_list)
         self.save()
 
+    def update_time_slots(self):
+        """Recompute the weekly time slots of this lab."""
+        (self.time_slots, self.day_mask,
+         self.first_slot, self.last_slot) = time_slot_columns(
+            self.days, self.start_time, self.end_time)
+
+    def save(self, *args, **kwargs):
+        """Keep the time slots in line with the days and times."""
+        self.update_time_slots()
+        super().save(*args, **kwargs)
+
     def get_start_time(self):
         """Convert the stored start time of a lab."""
         return str(self.start_time)
@@ -175,6 +194,20 @@ class Lab(models.Model):
     end_time = models.TimeField("End Time", auto_now=False,
                                 auto_now_add=False, blank=True, null=True)
 
+    # weekly mask of the time slots this lab is held in, see time_slots.py
+    time_slots = models.BinaryField("Time slots", default=EMPTY_MASK,
+                                    editable=False)
+
+    # the same time slots in a form the database can compare
+    day_mask = models.PositiveSmallIntegerField("Day mask", default=0,
+                                                editable=False)
+    first_slot = models.PositiveSmallIntegerField("First time slot",
+                                                  blank=True, null=True,
+                                                  editable=False)
+    last_slot = models.PositiveSmallIntegerField("Last time slot",
+                                                 blank=True, null=True,
+                                                 editable=False)
+
     semester = models.ForeignKey(
         'Semester',
         on_delete=models.CASCADE,
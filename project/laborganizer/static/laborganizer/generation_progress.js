@@ -0,0 +1,34 @@
+function poll_generation_progress(progress_url, done_url) {
+    $.ajax({
+	url: progress_url,
+	type: 'GET',
+	success: function(response) {
+	    var bar = document.getElementById('generation_progress_bar');
+	    var text = document.getElementById('generation_progress_text');
+
+	    // the job failed, show why and stop polling
+	    if (response.status == 'failed') {
+		bar.classList.add('bg-danger');
+		text.textContent = 'Schedule generation failed: ' + response.message;
+		return;
+	    }
+
+	    // the new schedule is ready, load it
+	    if (response.finished) {
+		window.location.href = done_url;
+		return;
+	    }
+
+	    bar.style.width = response.percent + '%';
+	    bar.setAttribute('aria-valuenow', response.percent);
+	    if (response.phase) {
+		text.textContent = response.phase + '... (' + response.elapsed + 's)';
+	    }
+
+	    // check again in a second
+	    setTimeout(function() {
+		poll_generation_progress(progress_url, done_url);
+	    }, 1000);
+	}
+    });
+}
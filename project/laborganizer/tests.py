@@ -1,3 +1,79 @@
-from django.test import TestCase
+"""Tests of the weekly time slot masks against the original conflict rule."""
+import itertools
+from datetime import time
+from django.test import SimpleTestCase
+from laborganizer.time_slots import (EMPTY_MASK, overlaps, slot_range,
+                                     split_days, time_slot_mask)
 
-# Create your tests here.
+
+def baseline_available(lab_days, lab_start, lab_end, ta_days, ta_start,
+                       ta_end):
+    """
+    The original optimization_primary.available(), on plain values.
+
+    The times are compared the same way. The original compared the days
+    through Lab.get_days(), a string, so single characters were matched and
+    'T' matched 'Th'. Whole days are compared here instead, which is what
+    the masks do.
+    """
+    if set(split_days(lab_days)) & set(split_days(ta_days)):
+        if ((ta_start >= lab_start and ta_start <= lab_end)
+            or (ta_end >= lab_start and ta_end <= lab_end)
+            or (lab_start >= ta_start and lab_start <= ta_end)
+            or (lab_end >= ta_start and lab_end <= ta_end)):
+            return False
+    return True
+
+
+def masks_overlap(lab_days, lab_start, lab_end, ta_days, ta_start, ta_end):
+    """Check if the masks of a lab and a class time share a slot."""
+    return overlaps(time_slot_mask(lab_days, lab_start, lab_end),
+                    time_slot_mask(ta_days, ta_start, ta_end))
+
+
+class TimeSlotTests(SimpleTestCase):
+    """Conflicts found through the masks."""
+
+    def test_touching_ranges_overlap(self):
+        """A class ending when a lab starts conflicts with it, as before."""
+        lab = ('M W', time(10), time(10, 50))
+        for class_time in [('M', time(10, 50), time(11, 40)),
+                           ('W', time(9, 10), time(10))]:
+            self.assertFalse(baseline_available(*lab, *class_time))
+            self.assertTrue(masks_overlap(*lab, *class_time))
+
+    def test_same_as_baseline(self):
+        """Times on the 5 minute grid conflict exactly when they did."""
+        starts = [time(hour, minute) for hour in (8, 9, 10)
+                  for minute in (0, 5, 25, 50, 55)]
+        ranges = [(start, time(start.hour + 1, start.minute))
+                  for start in starts]
+        ranges += [(start, time(start.hour, 55)) for start in starts
+                   if start.minute < 55]
+        for (lab_start, lab_end), (ta_start, ta_end) in itertools.product(
+                ranges, repeat=2):
+            self.assertEqual(
+                masks_overlap('T Th', lab_start, lab_end,
+                              'Th', ta_start, ta_end),
+                not baseline_available('T Th', lab_start, lab_end,
+                                       'Th', ta_start, ta_end),
+                (lab_start, lab_end, ta_start, ta_end))
+
+    def test_tuesday_is_not_thursday(self):
+        """'T' and 'Th' are different days, however they are separated."""
+        self.assertEqual(split_days('T,Th'), split_days('T Th'))
+        start, end = time(10), time(10, 50)
+        self.assertFalse(masks_overlap('Th', start, end, 'T', start, end))
+        self.assertFalse(masks_overlap('T', start, end, 'Th', start, end))
+        self.assertTrue(masks_overlap('T Th', start, end, 'Th', start, end))
+
+    def test_missing_times(self):
+        """Without both times there is no range, so nothing conflicts."""
+        self.assertIsNone(slot_range(None, time(10)))
+        self.assertIsNone(slot_range(time(10), None))
+        self.assertIsNone(slot_range(time(11), time(10)))
+        self.assertEqual(time_slot_mask('M', None, time(10)), EMPTY_MASK)
+        self.assertFalse(masks_overlap('M', time(9), time(11),
+                                       'M', None, None))
+        self.assertFalse(overlaps(None, time_slot_mask('M', time(9),
+                                                       time(11))))
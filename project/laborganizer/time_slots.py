@@ -0,0 +1,134 @@
+"""
+Weekly time slot masks for labs and TA class times.
+
+A week is split into five days of 5 minute slots. A lab or class time is
+stored as a bit mask of the slots it covers, so two of them overlap exactly
+when their masks share a bit.
+
+The same slots are also stored as a day mask and a first and last slot of
+the day, which the database can compare on its own. Two of them overlap
+when their day masks share a bit and their slot ranges meet.
+"""
+from datetime import time
+
+
+DAYS = ['M', 'T', 'W', 'Th', 'F']
+
+SLOT_MINUTES = 5
+SLOTS_PER_DAY = 24 * 60 // SLOT_MINUTES
+
+# size of a stored mask, one bit per slot of the week
+MASK_BYTES = len(DAYS) * SLOTS_PER_DAY // 8
+
+EMPTY_MASK = bytes(MASK_BYTES)
+
+
+def split_days(days):
+    """
+    Return the day indices of a day string.
+
+    Labs separate their days by spaces and class times by commas, so both
+    are accepted. Unknown days are ignored.
+    """
+    if not days:
+        return []
+    tokens = days.replace(',', ' ').split()
+    return [DAYS.index(day) for day in tokens if day in DAYS]
+
+
+def to_minutes(value):
+    """Convert a time of day, or an 'HH:MM[:SS]' string, to minutes."""
+    if isinstance(value, str):
+        value = time.fromisoformat(value)
+    return value.hour * 60 + value.minute
+
+
+def day_mask(days):
+    """Return a mask with one bit per day of a day string."""
+    mask = 0
+    for day in split_days(days):
+        mask |= 1 << day
+    return mask
+
+
+def slot_range(start_time, end_time):
+    """
+    Return the first and last slot of a day between two times.
+
+    Both the slot holding the start time and the slot holding the end time
+    are covered, so a class ending when a lab starts still overlaps it.
+    Return None if either time is missing or they are out of order.
+    """
+    if start_time is None or end_time is None:
+        return None
+
+    first_slot = to_minutes(start_time) // SLOT_MINUTES
+    last_slot = min(to_minutes(end_time) // SLOT_MINUTES, SLOTS_PER_DAY - 1)
+    if last_slot < first_slot:
+        return None
+    return first_slot, last_slot
+
+
+def time_slot_mask(days, start_time, end_time):
+    """
+    Return the weekly mask of the given days between two times.
+
+    Return an empty mask if there is no time range, see slot_range().
+    """
+    slots = slot_range(start_time, end_time)
+    if slots is None:
+        return EMPTY_MASK
+    first_slot, last_slot = slots
+
+    # bits covering a single day, shifted into place for every day
+    day_bits = ((1 << (last_slot - first_slot + 1)) - 1) << first_slot
+    mask = 0
+    for day in split_days(days):
+        mask |= day_bits << (day * SLOTS_PER_DAY)
+    return mask.to_bytes(MASK_BYTES, 'little')
+
+
+def time_slot_columns(days, start_time, end_time):
+    """
+    Return every stored form of the given days between two times.
+
+    Return the weekly mask, the day mask, the first slot and the last slot.
+    The slots are None if there is no time range.
+    """
+    first_slot, last_slot = slot_range(start_time, end_time) or (None, None)
+    return (time_slot_mask(days, start_time, end_time), day_mask(days),
+            first_slot, last_slot)
+
+
+def fill_time_slots(model, using='default'):
+    """
+    Recompute the stored time slots of every row of a model.
+
+    model = Lab or ClassTime, or their historical model in a migration
+    using = alias of the database to update
+
+    save() keeps the time slots up to date, this catches rows written
+    without it, such as loaded fixtures, bulk creates and updates. Only
+    rows whose time slots changed are written, bulk_update sends no
+    signals. Return the primary keys of those rows.
+    """
+    fields = ['time_slots', 'day_mask', 'first_slot', 'last_slot']
+    changed = []
+    for row in model.objects.using(using).only('days', 'start_time',
+                                               'end_time', *fields):
+        stored = (bytes(row.time_slots or EMPTY_MASK), row.day_mask,
+                  row.first_slot, row.last_slot)
+        columns = time_slot_columns(row.days, row.start_time, row.end_time)
+        if columns != stored:
+            (row.time_slots, row.day_mask,
+             row.first_slot, row.last_slot) = columns
+            changed.append(row)
+    model.objects.using(using).bulk_update(changed, fields, batch_size=500)
+    return [row.pk for row in changed]
+
+
+def overlaps(first_mask, second_mask):
+    """Check if two weekly masks share a time slot."""
+    first = int.from_bytes(first_mask or EMPTY_MASK, 'little')
+    second = int.from_bytes(second_mask or EMPTY_MASK, 'little')
+    return bool(first & second)
@@ -16,10 +16,14 @@ urlpatterns = [
          name='lo_semester_management'),
     path('generate_schedule', views.lo_generate_schedule,
          name='lo_generate_schedule'),
+    path('generation_progress/<int:job_id>', views.lo_generation_progress,
+         name='lo_generation_progress'),
     path('edit_lab', views.lo_edit_lab, name='lo_edit_lab'),
     path('allow_ta_edit', views.lo_allow_ta_edit, name='lo_allow_ta_edit'),
     path('assign_to_template', views.lo_assign_to_template,
          name='lo_assign_to_template'),
+    path('unpin_assignment', views.lo_unpin_assignment,
+         name='lo_unpin_assignment'),
     path('select_schedule_version', views.lo_select_schedule_version,
          name='lo_select_schedule_version'),
     path('propogate_schedule', views.lo_propogate_schedule,
@@ -11,10 +11,14 @@ Variables used throughout LO dashboard:
 'current_semester': used to display which semester is currently chosen/active
 """
 from django.shortcuts import render, redirect
+from django.conf import settings
 from django.core.cache import cache
 from teachingassistant.models import TA, Holds
 from .models import Semester, Lab, AllowTAEdit, LOCache
-from optimization.models import History, TemplateSchedule, TemplateAssignment
+from .time_slots import overlaps
+from optimization.models import History, TemplateSchedule, ScheduleJob
+from optimization.solvers import engine_choices
+from optimization.optimization_primary import class_time_masks
 from django.contrib import messages
 from laborganizer.lo_utils import (get_current_semester,
                                    get_tas_by_semester,
@@ -34,8 +38,7 @@ from laborganizer.lo_utils import (get_current_semester,
                                    filter_out_nolabs,
                                    add_labs)
 from django.contrib.auth.decorators import login_required
-from optimization.optimization_utils import (generate_by_selection,
-                                             propogate_schedule)
+from optimization.optimization_utils import propogate_schedule
 from django.http import JsonResponse
 
 
@@ -118,6 +121,23 @@ def lo_home(request, selected_semester=None, template_schedule=None):
             tas = get_tas_by_semester(current_semester['time'],
                                       current_semester['year'])
 
+            # the assignment of every lab in the shown template
+            assignments = {}
+            if template_schedule is not None:
+                assignments = {assignment.lab_id: assignment for assignment
+                               in template_schedule.assignments.select_related(
+                                   'ta')}
+
+            # only offer the TA's that are free at the time of each lab, from
+            # the class times of every TA loaded in one query
+            class_times = list(zip(tas, class_time_masks(tas)))
+            for lab in labs:
+                lab.available_tas = [
+                    ta for ta, masks in class_times
+                    if not any(overlaps(lab.time_slots, mask)
+                               for mask in masks)]
+                lab.assignment = assignments.get(lab.pk)
+
             # check if there are any TA's with incomplete profiles
             ta_incomplete = False
             for ta in tas:
@@ -136,6 +156,16 @@ def lo_home(request, selected_semester=None, template_schedule=None):
             # get all history nodes that are active
             history = template_schedule.his_nodes.all()
 
+            # get the newest schedule generation of the semester while it is
+            # waiting or running, or failed so the LO can see why
+            schedule_job = ScheduleJob.objects.filter(
+                semester__semester_time=current_semester['time'],
+                semester__year=current_semester['year']
+            ).order_by('-pk').first()
+            if (schedule_job is not None
+                    and schedule_job.status == ScheduleJob.DONE):
+                schedule_job = None
+
             # instantiate context variable
             context = {
                 'labs': labs,
@@ -146,6 +176,9 @@ def lo_home(request, selected_semester=None, template_schedule=None):
                 'schedule_versions': template_schedule_versions,
                 'history': history,
                 'ta_incomplete': ta_incomplete,
+                'schedule_job': schedule_job,
+                'solvers': engine_choices(),
+                'time_budget': settings.SOLVER_TIME_BUDGET,
             }
 
         return render(request, 'laborganizer/dashboard.html', context)
@@ -190,12 +223,12 @@ def lo_generate_switches(course_id, current_semester, template_schedule):
     else:
         return None
 
-    # remove selected ta so that it is not compared against itself
-    tas = list(tas)
-    tas.remove(selected_ta)
+    # only TA's free at the time of the selected lab can switch into it,
+    # and the selected ta is not compared against itself
+    tas = list(tas.available_for(selected_lab).exclude(pk=selected_ta.pk))
 
     # remove TA's that were not considered for scoreing
-    tas = filter_out_unscored(tas)
+    tas = filter_out_unscored(tas, template_schedule)
 
     # filter out tas with no previous lab assignments
     tas = filter_out_nolabs(tas, template_schedule)
@@ -308,9 +341,9 @@ def generate_assignment_node(ta, lab, template_schedule):
 
     # find idenity of other TA to switch
     other_ta = None
-    for assignment in TemplateAssignment.objects.all():
-        if assignment.lab == lab:
-            other_ta = assignment.ta
+    assignment = template_schedule.get_lab_assignment(lab)
+    if assignment is not None:
+        other_ta = assignment.ta
 
     # set up node for switching
     relative_node_id = len(template_schedule.his_nodes.all()) + 1
@@ -379,8 +412,9 @@ def lo_assign_to_template(request):
             # generate the history node for the assignment
             generate_assignment_node(ta, lab, template_schedule)
 
-            # assign the ta to the selected lab
-            template_schedule.assign(ta, lab)
+            # assign the ta to the selected lab, pinned so that
+            # regenerating the schedule keeps it
+            template_schedule.assign(ta, lab, pinned=True)
             template_schedule.save()
 
         return redirect('lo_home')
@@ -389,6 +423,51 @@ def lo_assign_to_template(request):
     return redirect('sign_in')
 
 
+@login_required
+def lo_unpin_assignment(request):
+    """Unpin the assignment of a lab, so regenerating may change it."""
+    # ensure the user is a superuser
+    if request.user.is_superuser:
+        if request.method == 'POST':
+            course_id = request.POST.get('course_id')
+            time = request.POST.get('time')  # time of the desired semester
+            year = request.POST.get('year')  # year of the desired semester
+            version = request.POST.get('version')  # template schedule version
+
+            lab = Lab.objects.get(course_id=course_id)
+            template_schedule = get_template_schedule(time, year, version)
+            if template_schedule.unpin(lab):
+                messages.success(request, 'The assignment is no longer pinned!')
+
+        return redirect('lo_home')
+
+    # user is not a superuser, take them back to the login page
+    return redirect('sign_in')
+
+
+@login_required
+def lo_generation_progress(request, job_id):
+    """Report the progress of a schedule generation job as JSON."""
+    if request.user.is_superuser:
+        try:
+            job = ScheduleJob.objects.get(pk=job_id)
+        except ScheduleJob.DoesNotExist:
+            return JsonResponse({'result': False}, status=404)
+
+        return JsonResponse({
+            'result': True,
+            'status': job.status,
+            'phase': job.phase,
+            'percent': job.percent,
+            'elapsed': round(job.get_elapsed(), 1),
+            'finished': job.is_finished(),
+            'message': job.message,
+        }, status=200)
+
+    # user is not a superuser, take them back to the login page
+    return redirect('sign_in')
+
+
 @login_required
 def lo_select_semester(request):
     """
@@ -444,6 +523,34 @@ def lo_generate_schedule(request):
             priority = request.POST.get('priority')
             priority_bonus = priority_value_table[priority]
 
+            # keep the assignments of the current version that still hold
+            warm_start = request.POST.get('warm_start') == 'on'
+
+            # solve independent groups of TA's and labs apart, and generate
+            # even when the selected TA's cannot cover every lab
+            decompose = request.POST.get('decompose') == 'on'
+            allow_uncovered = request.POST.get('allow_uncovered') == 'on'
+
+            # swap TA's between labs after solving, off unless asked for
+            local_search = request.POST.get('local_search') == 'on'
+
+            # engine picked by the LO, see optimization.solvers
+            solver = request.POST.get('solver', 'greedy')
+            if solver not in dict(engine_choices()):
+                messages.warning(request, 'Please choose a known solver!')
+                return redirect('lo_home')
+
+            # seconds the solver may spend, engines like 'anytime' would
+            # otherwise search until they prove their schedule optimal
+            try:
+                time_budget = float(request.POST.get('time_budget') or
+                                    settings.SOLVER_TIME_BUDGET)
+            except ValueError:
+                time_budget = 0
+            if time_budget <= 0:
+                messages.warning(request, 'Please enter a time limit above zero seconds!')
+                return redirect('lo_home')
+
             # get the student id's of all selected TA's
             ta_ids = request.POST.getlist('checks[]')
             year = request.POST.get('year')
@@ -454,14 +561,8 @@ def lo_generate_schedule(request):
                 'year': year
             }
 
-            # gather a list of all selected TA's, if any
-            if len(ta_ids) != 0:
-                tas = []
-                for ta_id in ta_ids:
-                    ta = TA.objects.get(student_id=ta_id)
-                    tas.append(ta)
-            else:
-                # there are no selected TA's, we cannot create a schedule
+            # there are no selected TA's, we cannot create a schedule
+            if len(ta_ids) == 0:
                 messages.warning(request, 'There are no TA\'s selected to generate a schedule for!')
                 return redirect('lo_home')
 
@@ -471,13 +572,22 @@ def lo_generate_schedule(request):
 
             # check if there are any labs in the chosen semester
             if labs is not None:
-                # using those TA's, populate a TemplateSchedule object from
-                # optimization.models
-                template_schedule = generate_by_selection(tas, labs, selected_semester, priority_bonus)
-
-                # set the cache
+                # queue the generation of a TemplateSchedule object from
+                # those TA's, a worker (manage.py run_schedule_jobs) runs it
+                # while the dashboard polls its progress
+                semester = Semester.objects.get(semester_time=time, year=year)
+                ScheduleJob.objects.create(semester=semester,
+                                           ta_ids=','.join(ta_ids),
+                                           priority_bonus=priority_bonus,
+                                           solver=solver,
+                                           time_budget=time_budget,
+                                           warm_start=warm_start,
+                                           decompose=decompose,
+                                           allow_uncovered=allow_uncovered,
+                                           local_search=local_search)
+
+                # set the cache, the worker sets the new template schedule
                 lo_cache.set_semester(selected_semester)
-                lo_cache.set_template_schedule(template_schedule)
 
                 return redirect('lo_home')
 
@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class OptimizationConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'optimization'
+
+    def ready(self):
+        # connect the signals that rescore TA's when their profile changes
+        from . import signals  # noqa: F401
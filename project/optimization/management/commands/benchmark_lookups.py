@@ -0,0 +1,114 @@
+"""Before/after benchmark of the indexed semester, lab and template lookups."""
+import time
+from django.apps import apps
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection, migrations, transaction
+from django.db.migrations.state import ProjectState
+from laborganizer.models import Semester, Lab
+from optimization.models import TemplateSchedule
+
+
+# models whose Meta indexes and constraints back the lookups below
+INDEXED_MODELS = (Semester, Lab, TemplateSchedule)
+
+
+class Command(BaseCommand):
+    """Time the hot lookups with and without their indexes."""
+
+    help = ('Time the hot semester, lab and template lookups and show '
+            'their query plans with the indexes and without them. The '
+            'indexes are dropped inside a transaction that is rolled back.')
+
+    def add_arguments(self, parser):
+        """Define command line options."""
+        parser.add_argument('--repeat', type=int, default=200,
+                            help='number of times each lookup is run')
+        parser.add_argument('--plans', action='store_true',
+                            help='print the query plan of every lookup')
+
+    def handle(self, *args, **options):
+        """Measure every lookup, drop the indexes and measure again."""
+        if not connection.features.can_rollback_ddl:
+            raise CommandError('The database cannot roll back schema '
+                               'changes, so the indexes cannot be dropped '
+                               'for the comparison.')
+        lab = Lab.objects.exclude(semester=None).select_related(
+            'semester').first()
+        if lab is None:
+            raise CommandError('There is no lab to look up.')
+        lookups = hot_lookups(lab)
+
+        # SQLite only allows schema changes in a transaction with foreign
+        # key checks turned off
+        connection.disable_constraint_checking()
+        try:
+            with transaction.atomic():
+                after = measure(lookups, options['repeat'])
+                drop_indexes()
+                before = measure(lookups, options['repeat'])
+                transaction.set_rollback(True)
+        finally:
+            connection.enable_constraint_checking()
+
+        self.stdout.write(f'{"lookup":<32}{"before ms":>12}{"after ms":>12}')
+        for name, query in lookups:
+            self.stdout.write(f'{name:<32}{before[name][0]:>12.3f}'
+                              f'{after[name][0]:>12.3f}')
+        if options['plans']:
+            for name, query in lookups:
+                self.stdout.write(f'\n{name}\n  before: {before[name][1]}'
+                                  f'\n  after:  {after[name][1]}')
+
+
+def drop_indexes():
+    """
+    Drop the Meta indexes and constraints of INDEXED_MODELS.
+
+    The drops are run as migration operations, so backends that rebuild a
+    table to drop a constraint rebuild it without the constraint.
+    """
+    state = ProjectState.from_apps(apps)
+    operations = []
+    for model in INDEXED_MODELS:
+        opts = model._meta
+        for index in opts.indexes:
+            operations.append((opts.app_label, migrations.RemoveIndex(
+                opts.model_name, index.name)))
+        for constraint in opts.constraints:
+            operations.append((opts.app_label, migrations.RemoveConstraint(
+                opts.model_name, constraint.name)))
+
+    with connection.schema_editor(atomic=False) as editor:
+        for app_label, operation in operations:
+            new_state = state.clone()
+            operation.state_forwards(app_label, new_state)
+            operation.database_forwards(app_label, editor, state, new_state)
+            state = new_state
+
+
+def hot_lookups(lab):
+    """Return (name, function returning a QuerySet) pairs for each lookup."""
+    semester = lab.semester
+    return [
+        ('semester by time and year', lambda: Semester.objects.filter(
+            semester_time=semester.semester_time, year=semester.year)),
+        ('labs of a semester', lambda: Lab.objects.filter(
+            semester__semester_time=semester.semester_time,
+            semester__year=semester.year)),
+        ('labs of a catalog ID', lambda: Lab.objects.filter(
+            semester=semester, catalog_id=lab.catalog_id)),
+        ('most recent template', lambda: TemplateSchedule.objects.filter(
+            semester=semester).order_by('-version_number')[:1]),
+    ]
+
+
+def measure(lookups, repeat):
+    """Return the average milliseconds and query plan of every lookup."""
+    results = {}
+    for name, query in lookups:
+        started = time.perf_counter()
+        for _ in range(repeat):
+            list(query())
+        elapsed = (time.perf_counter() - started) * 1000 / repeat
+        results[name] = (elapsed, query().explain().replace('\n', '; '))
+    return results
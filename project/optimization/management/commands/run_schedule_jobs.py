@@ -0,0 +1,50 @@
+"""Worker process running queued template schedule generation jobs."""
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from optimization.models import (ScheduleJob, clear_score_matrices,
+                                 clear_flattened_assignments)
+from optimization.optimization_utils import run_schedule_job
+
+
+class Command(BaseCommand):
+    """Run ScheduleJob objects as they are queued by the LO dashboard."""
+
+    help = 'Run queued template schedule generation jobs.'
+
+    def add_arguments(self, parser):
+        """Define command line options."""
+        parser.add_argument('--once', action='store_true',
+                            help='run the queued jobs, then exit')
+        parser.add_argument('--interval', type=float, default=2.0,
+                            help='seconds to wait between queue checks')
+
+    def handle(self, *args, **options):
+        """Poll the job table and run every job that can be claimed."""
+        while True:
+            # jobs of workers that crashed would otherwise run forever
+            stale = ScheduleJob.fail_stale(settings.SCHEDULE_JOB_TIMEOUT)
+            if stale:
+                self.stdout.write(f'Failed {stale} stale job(s)')
+
+            job = ScheduleJob.objects.filter(
+                status=ScheduleJob.QUEUED).order_by('pk').first()
+
+            if job is None:
+                # nothing to do, stop or wait for the next job
+                if options['once']:
+                    return
+                time.sleep(options['interval'])
+                continue
+
+            # another worker may have taken the job in the meantime
+            if not job.claim():
+                continue
+
+            # read scores and assignments as they are now, like a request
+            clear_score_matrices()
+            clear_flattened_assignments()
+
+            self.stdout.write(f'Running job {job.pk} ({job.semester})')
+            run_schedule_job(job)
+            self.stdout.write(f'Job {job.pk} {job.status}')
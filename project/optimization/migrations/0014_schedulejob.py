@@ -0,0 +1,33 @@
+# Generated by Django 4.0.1 on 2026-10-18 18:30
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laborganizer', '0025_lab_day_mask_lab_first_slot_lab_last_slot'),
+        ('optimization', '0013_history_is_assignment'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScheduleJob',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ta_ids', models.TextField(blank=True, verbose_name="Selected TA's")),
+                ('priority_bonus', models.IntegerField(default=0, verbose_name='Priority bonus')),
+                ('solver', models.CharField(default='greedy', max_length=20, verbose_name='Solver')),
+                ('status', models.CharField(choices=[('queued', 'Queued'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed')], default='queued', max_length=10, verbose_name='Status')),
+                ('phase', models.CharField(blank=True, max_length=50, verbose_name='Phase')),
+                ('percent', models.PositiveSmallIntegerField(default=0, verbose_name='Percent done')),
+                ('message', models.TextField(blank=True, verbose_name='Error message')),
+                ('created', models.DateTimeField(auto_now_add=True)),
+                ('started', models.DateTimeField(blank=True, null=True)),
+                ('finished', models.DateTimeField(blank=True, null=True)),
+                ('semester', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='laborganizer.semester')),
+                ('template_schedule', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to='optimization.templateschedule')),
+            ],
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 4.0.1 on 2026-10-18 19:05
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0014_schedulejob'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulejob',
+            name='time_budget',
+            field=models.FloatField(blank=True, null=True, verbose_name='Time budget (seconds)'),
+        ),
+        migrations.AddField(
+            model_name='templateschedule',
+            name='is_optimal',
+            field=models.BooleanField(default=False, verbose_name='Proven optimal'),
+        ),
+        migrations.AddField(
+            model_name='templateschedule',
+            name='objective',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Objective value'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-18 19:40
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0015_schedulejob_time_budget_templateschedule_is_optimal_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulejob',
+            name='warm_start',
+            field=models.BooleanField(default=False, verbose_name='Warm start'),
+        ),
+    ]
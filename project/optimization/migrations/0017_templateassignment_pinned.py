@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-18 20:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0016_schedulejob_warm_start'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateassignment',
+            name='pinned',
+            field=models.BooleanField(default=False, verbose_name='Pinned'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-18 20:45
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0017_templateassignment_pinned'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateschedule',
+            name='priority_bonus',
+            field=models.IntegerField(default=0, verbose_name='Priority bonus'),
+        ),
+    ]
@@ -0,0 +1,68 @@
+# Generated by Django 4.0.1 on 2026-10-18 21:10
+
+import django.db.models.deletion
+import numpy as np
+from django.db import migrations, models
+
+
+def convert_score_pairs(apps, schema_editor):
+    """Store the ScorePair objects of every template as a score matrix."""
+    TemplateSchedule = apps.get_model('optimization', 'TemplateSchedule')
+    ScoreMatrix = apps.get_model('optimization', 'ScoreMatrix')
+    Lab = apps.get_model('laborganizer', 'Lab')
+    TA = apps.get_model('teachingassistant', 'TA')
+
+    for template in TemplateSchedule.objects.exclude(semester=None):
+        rows = list(TA.scores.through.objects.filter(
+            scorepair__schedule_key=str(template.pk)).values_list(
+                'ta_id', 'scorepair__score_catalog_id',
+                'scorepair__semester_id', 'scorepair__score'))
+        if not rows:
+            continue
+
+        # a ScorePair holds the score of every lab of its catalog ID
+        labs = list(Lab.objects.filter(semester=template.semester_id)
+                    .order_by('pk').values_list('pk', 'catalog_id',
+                                                'semester_id'))
+        columns = {}
+        for index, (pk, catalog_id, semester_id) in enumerate(labs):
+            columns.setdefault((catalog_id, semester_id), []).append(index)
+        ta_ids = sorted({ta_id for ta_id, _, _, _ in rows})
+        ta_index = {pk: index for index, pk in enumerate(ta_ids)}
+
+        scores = np.full((len(ta_ids), len(labs)), -2 ** 15, dtype='<i2')
+        for ta_id, catalog_id, semester_id, score in rows:
+            scores[ta_index[ta_id], columns.get((catalog_id, semester_id),
+                                                [])] = np.clip(
+                score, -2 ** 15 + 1, 2 ** 15 - 1)
+
+        ScoreMatrix.objects.create(
+            template=template,
+            ta_ids=np.array(ta_ids, dtype='<i8').tobytes(),
+            lab_ids=np.array([pk for pk, _, _ in labs], dtype='<i8').tobytes(),
+            scores=scores.tobytes(),
+            version=1)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laborganizer', '0025_lab_day_mask_lab_first_slot_lab_last_slot'),
+        ('teachingassistant', '0031_classtime_day_mask_classtime_first_slot_and_more'),
+        ('optimization', '0018_templateschedule_priority_bonus'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='ScoreMatrix',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('ta_ids', models.BinaryField(verbose_name='TA primary keys')),
+                ('lab_ids', models.BinaryField(verbose_name='Lab primary keys')),
+                ('scores', models.BinaryField(verbose_name='Scores')),
+                ('version', models.PositiveIntegerField(default=0, verbose_name='Version')),
+                ('template', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, related_name='score_matrix', to='optimization.templateschedule')),
+            ],
+        ),
+        migrations.RunPython(convert_score_pairs, migrations.RunPython.noop),
+    ]
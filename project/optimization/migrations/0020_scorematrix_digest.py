@@ -0,0 +1,31 @@
+# Generated by Django 4.0.1 on 2026-10-18 21:40
+
+import hashlib
+from django.db import migrations, models
+
+
+def fill_digests(apps, schema_editor):
+    """Compute the digest of every stored score matrix."""
+    ScoreMatrix = apps.get_model('optimization', 'ScoreMatrix')
+    matrices = list(ScoreMatrix.objects.all())
+    for matrix in matrices:
+        matrix.digest = hashlib.blake2b(
+            bytes(matrix.ta_ids) + bytes(matrix.lab_ids)
+            + bytes(matrix.scores), digest_size=16).hexdigest()
+    ScoreMatrix.objects.bulk_update(matrices, ['digest'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0019_scorematrix'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='scorematrix',
+            name='digest',
+            field=models.CharField(blank=True, default='', max_length=32, verbose_name='Digest'),
+        ),
+        migrations.RunPython(fill_digests, migrations.RunPython.noop),
+    ]
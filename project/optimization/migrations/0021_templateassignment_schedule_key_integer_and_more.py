@@ -0,0 +1,44 @@
+# Generated by Django 4.0.1 on 2026-10-18 22:05
+
+from django.db import migrations, models
+
+
+def copy_schedule_keys(apps, schema_editor):
+    """Copy the schedule key of every assignment into the integer field."""
+    TemplateAssignment = apps.get_model('optimization', 'TemplateAssignment')
+    assignments = list(TemplateAssignment.objects.exclude(schedule_key=None))
+    for assignment in assignments:
+        if assignment.schedule_key.strip().isdigit():
+            assignment.schedule_number = int(assignment.schedule_key)
+    TemplateAssignment.objects.bulk_update(assignments, ['schedule_number'],
+                                           batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('laborganizer', '0026_lab_semester_catalog_index_and_more'),
+        ('optimization', '0020_scorematrix_digest'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateassignment',
+            name='schedule_number',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Schedule Key'),
+        ),
+        migrations.RunPython(copy_schedule_keys, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='templateassignment',
+            name='schedule_key',
+        ),
+        migrations.RenameField(
+            model_name='templateassignment',
+            old_name='schedule_number',
+            new_name='schedule_key',
+        ),
+        migrations.AddIndex(
+            model_name='templateschedule',
+            index=models.Index(fields=['semester', 'version_number'], name='optimizatio_semeste_16d81e_idx'),
+        ),
+    ]
@@ -0,0 +1,77 @@
+# Generated by Django 4.0.1 on 2026-10-18 22:40
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def link_assignments(apps, schema_editor):
+    """
+    Point every assignment at the template schedule it was added to.
+
+    An assignment added to several templates is copied for each of them,
+    assignments of no template are deleted and when a lab was assigned
+    more than once in a template, only its newest assignment is kept.
+    """
+    TemplateAssignment = apps.get_model('optimization', 'TemplateAssignment')
+    Through = apps.get_model('optimization',
+                             'TemplateSchedule').assignments.through
+
+    linked = set()
+    copies = []
+    for schedule_id, assignment_id in Through.objects.order_by(
+            'pk').values_list('templateschedule_id', 'templateassignment_id'):
+        if assignment_id not in linked:
+            TemplateAssignment.objects.filter(pk=assignment_id).update(
+                schedule_id=schedule_id)
+            linked.add(assignment_id)
+        else:
+            copy = TemplateAssignment.objects.get(pk=assignment_id)
+            copy.pk = None
+            copy.schedule_id = schedule_id
+            copies.append(copy)
+    TemplateAssignment.objects.bulk_create(copies, batch_size=500)
+    TemplateAssignment.objects.filter(schedule=None).delete()
+
+    newest = {}
+    duplicates = []
+    for pk, schedule_id, lab_id in TemplateAssignment.objects.exclude(
+            lab=None).order_by('-pk').values_list('pk', 'schedule_id',
+                                                  'lab_id'):
+        if (schedule_id, lab_id) in newest:
+            duplicates.append(pk)
+        else:
+            newest[(schedule_id, lab_id)] = pk
+    TemplateAssignment.objects.filter(pk__in=duplicates).delete()
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0021_templateassignment_schedule_key_integer_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateassignment',
+            name='schedule',
+            field=models.ForeignKey(null=True, on_delete=django.db.models.deletion.CASCADE, related_name='+', to='optimization.templateschedule'),
+        ),
+        migrations.RunPython(link_assignments, migrations.RunPython.noop),
+        migrations.RemoveField(
+            model_name='templateschedule',
+            name='assignments',
+        ),
+        migrations.RemoveField(
+            model_name='templateassignment',
+            name='schedule_key',
+        ),
+        migrations.AlterField(
+            model_name='templateassignment',
+            name='schedule',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='assignments', to='optimization.templateschedule'),
+        ),
+        migrations.AddConstraint(
+            model_name='templateassignment',
+            constraint=models.UniqueConstraint(fields=('schedule', 'lab'), name='unique_schedule_lab'),
+        ),
+    ]
@@ -0,0 +1,24 @@
+# Generated by Django 4.0.1 on 2026-10-18 23:20
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0022_templateassignment_schedule'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateschedule',
+            name='parent',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='children', to='optimization.templateschedule'),
+        ),
+        migrations.AlterField(
+            model_name='templateassignment',
+            name='schedule',
+            field=models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='own_assignments', to='optimization.templateschedule'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-19 09:10
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0023_templateschedule_parent_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='templateassignment',
+            name='score',
+            field=models.IntegerField(blank=True, null=True, verbose_name='Score when assigned'),
+        ),
+    ]
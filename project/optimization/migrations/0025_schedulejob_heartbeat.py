@@ -0,0 +1,26 @@
+# Generated by Django 4.0.1 on 2026-10-19 09:30
+
+from django.db import migrations, models
+
+
+def start_heartbeats(apps, schema_editor):
+    """Count the jobs already claimed as last heard from when they started."""
+    ScheduleJob = apps.get_model('optimization', 'ScheduleJob')
+    ScheduleJob.objects.exclude(started=None).update(
+        heartbeat=models.F('started'))
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0024_templateassignment_score'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulejob',
+            name='heartbeat',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+        migrations.RunPython(start_heartbeats, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 4.0.1 on 2026-10-19 09:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0025_schedulejob_heartbeat'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulejob',
+            name='allow_uncovered',
+            field=models.BooleanField(default=False, verbose_name='Allow uncovered labs'),
+        ),
+        migrations.AddField(
+            model_name='schedulejob',
+            name='decompose',
+            field=models.BooleanField(default=False, verbose_name='Solve independent groups apart'),
+        ),
+    ]
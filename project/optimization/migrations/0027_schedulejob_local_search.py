@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-19 11:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('optimization', '0026_schedulejob_allow_uncovered_schedulejob_decompose'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='schedulejob',
+            name='local_search',
+            field=models.BooleanField(default=False, verbose_name='Improve with swaps'),
+        ),
+    ]
@@ -1,12 +1,58 @@
 """Models for optimized schedules."""
-from django.db import models
+import hashlib
+import threading
+from datetime import timedelta
+import numpy as np
+from django.conf import settings
+from django.db import models, transaction
+from django.utils import timezone
 from laborganizer.models import Semester, Lab
 from teachingassistant.models import TA
-from optimization.optimization_primary import (initialization)
+from optimization.optimization_primary import (build_score_matrix,
+                                               save_scores,
+                                               CONFLICT_THRESHOLD)
+from optimization import score_cache
+from optimization.solvers import (Problem, get_engine, local_search,
+                                  solve_components, max_matching,
+                                  hall_violator)
+
+
+class InfeasibleScheduleError(Exception):
+    """
+    Raised when the selected TA's cannot cover every lab.
+
+    labs = labs that cannot all be covered
+    tas = the only TA's free for those labs, all of their room is used
+    """
+
+    def __init__(self, labs, tas, room):
+        self.labs = labs
+        self.tas = tas
+        names = ', '.join(str(lab) for lab in labs[:10])
+        if len(labs) > 10:
+            names += f' and {len(labs) - 10} more'
+        free = ', '.join(str(ta) for ta in tas) or 'no TA'
+        super().__init__(
+            f'{len(labs)} labs cannot all be covered ({names}). Only {free} '
+            f'can take them, with room for {room}. Select more TA\'s free '
+            f'at those times or raise their lab limits.')
 
 
 class TemplateAssignment(models.Model):
-    """Non-propogated TA assignments for use in the template schedule."""
+    """
+    Non-propogated TA assignments for use in the template schedule.
+
+    In a template built on a parent, see TemplateSchedule.parent, an
+    assignment without a TA unassigns a lab the parent assigned.
+    """
+
+    class Meta:
+        """Meta information for a TemplateAssignment object."""
+
+        constraints = [
+            models.UniqueConstraint(fields=['schedule', 'lab'],
+                                    name='unique_schedule_lab'),
+        ]
 
     def __str__(self):
         """Define human readable object name."""
@@ -16,240 +62,510 @@ class TemplateAssignment(models.Model):
                             blank=True, null=True)
     ta = models.ForeignKey(TA, on_delete=models.CASCADE,
                            blank=True, null=True)
-    schedule_key = models.CharField('Schedule Key', max_length=10,
-                                    blank=True, null=True)
+
+    # template schedule this assignment belongs to, each lab is assigned
+    # at most once per template. Read a template's assignments through
+    # TemplateSchedule.assignments, which includes inherited ones.
+    schedule = models.ForeignKey('TemplateSchedule', on_delete=models.CASCADE,
+                                 related_name='own_assignments')
+
+    # set when the LO made this assignment by hand, pinned assignments are
+    # carried over to new versions instead of being solved again
+    pinned = models.BooleanField('Pinned', default=False)
+
+    # score of the TA for the lab when the assignment was made, scores are
+    # rescored later on, see TemplateSchedule.warm_start
+    score = models.IntegerField('Score when assigned', blank=True, null=True)
 
 
 class TemplateSchedule(models.Model):
-    """A templated schedule for the LO to create before propogation."""
+    """
+    A templated schedule for the LO to create before propogation.
+
+    A template built on a parent only stores the assignments that differ
+    from the parent's, and shares the parent's scores while they are the
+    same. Versions built on a template are given their own copy before the
+    template is changed, see copy_on_write().
+    """
+
+    class Meta:
+        """Meta information for a TemplateSchedule object."""
+
+        indexes = [
+            models.Index(fields=['semester', 'version_number']),
+        ]
 
     def __str__(self):
         """Define human readable object name."""
         return f'{self.semester}, v{self.version_number}'
 
+    @property
+    def assignments(self):
+        """The assignments in effect in this template, inherited included."""
+        if self.parent_id is None:
+            return self.own_assignments.all()
+        return TemplateAssignment.objects.filter(pk__in=self.assignment_ids())
+
+    def lineage(self):
+        """Return the primary keys of this template and its parents in order."""
+        # versions of a semester are built on each other, so all of them
+        # are read at once
+        parents = dict(TemplateSchedule.objects.filter(
+            semester_id=self.semester_id).values_list('pk', 'parent_id'))
+        chain = [self.pk]
+        parent_id = parents.get(self.pk, self.parent_id)
+        while parent_id is not None and parent_id not in chain:
+            chain.append(parent_id)
+            if parent_id not in parents:
+                parents[parent_id] = TemplateSchedule.objects.filter(
+                    pk=parent_id).values_list('parent_id', flat=True).first()
+            parent_id = parents[parent_id]
+        return chain
+
+    def assignment_ids(self):
+        """
+        Return the primary keys of the assignments in effect in this template.
+
+        Each lab takes the assignment of the nearest template in its
+        lineage that has one, labs unassigned there are left out. The
+        result is cached until the request ends or an assignment changes,
+        see clear_flattened_assignments.
+        """
+        cached = _cached_assignment_ids()
+        if self.pk not in cached:
+            chain = self.lineage()
+            depth = {pk: index for index, pk in enumerate(chain)}
+            nearest = {}
+            rows = TemplateAssignment.objects.filter(
+                schedule_id__in=chain).values_list('pk', 'schedule_id',
+                                                   'lab_id', 'ta_id')
+            for pk, schedule_id, lab_id, ta_id in rows:
+                # assignments without a lab never override each other
+                key = lab_id if lab_id is not None else -pk
+                if key not in nearest or depth[schedule_id] < nearest[key][0]:
+                    nearest[key] = (depth[schedule_id], pk, ta_id)
+            cached[self.pk] = [pk for _, pk, ta_id in nearest.values()
+                               if ta_id is not None]
+        return cached[self.pk]
+
+    def flatten(self):
+        """
+        Store every assignment and score of this template in it.
+
+        The template no longer depends on its parent afterwards, what it
+        reads stays the same.
+        """
+        if self.parent_id is None:
+            return
+        with transaction.atomic():
+            own = set(self.own_assignments.values_list('lab_id', flat=True))
+            inherited = self.parent.assignments.values_list('lab_id', 'ta_id',
+                                                            'pinned', 'score')
+            TemplateAssignment.objects.bulk_create(
+                [TemplateAssignment(schedule=self, lab_id=lab_id, ta_id=ta_id,
+                                    pinned=pinned, score=score)
+                 for lab_id, ta_id, pinned, score in inherited
+                 if lab_id not in own])
+            self.own_assignments.filter(ta=None).delete()
+
+            if not ScoreMatrix.objects.filter(template=self).exists():
+                matrix = score_matrix_for(self.parent_id)
+                if matrix is not None:
+                    matrix.copy_to(self.pk)
+
+            self.parent = None
+            self.save(update_fields=['parent'])
+        clear_flattened_assignments()
+        clear_score_matrices()
+
+    def copy_on_write(self):
+        """Flatten the templates built on this one before it changes."""
+        for child in self.children.all():
+            child.flatten()
+
+    def delete(self, *args, **kwargs):
+        """Flatten the templates built on this one, then delete it."""
+        self.copy_on_write()
+        return super().delete(*args, **kwargs)
+
+    def store_assignments(self, rows):
+        """
+        Store assignments in this template in bulk.
+
+        rows maps lab primary keys to (TA primary key, pinned, score)
+        tuples. Any assignment this template has for those labs is replaced.
+        """
+        self.copy_on_write()
+        self.own_assignments.filter(lab__in=list(rows)).delete()
+        TemplateAssignment.objects.bulk_create(
+            [TemplateAssignment(lab_id=lab_id, ta_id=ta_id, schedule=self,
+                                pinned=pinned, score=score)
+             for lab_id, (ta_id, pinned, score) in rows.items()])
+        clear_flattened_assignments()
 
     def lab_has_an_assignment(self, lab):
-        assignments = self.assignments.all()
-        for assignment in assignments:
-            if assignment.lab == lab:
-                return True
-        return False
-    def get_lab_assignment(self, lab):
-        assignments = self.assignments.all()
+        return self.assignments.filter(lab=lab).exists()
 
-        if self.lab_has_an_assignment(lab):
-            lab_assignment = assignments.get(lab=lab)
-            return lab_assignment
+    def get_lab_assignment(self, lab):
+        return self.assignments.filter(lab=lab).first()
 
     """get other labs score"""
     """Function: Check if a given ta has a lab assigned to them"""
     def ta_assigned_to_lab(self, ta):
-        assignments = self.assignments.all()
-        for assignment in assignments:
-            if assignment.ta == ta:
-                return True
-        return False
+        return self.assignments.filter(ta=ta).exists()
 
     def all_labs_have_assignment(self, labs):
-
-        for lab in labs:
-            if not self.lab_has_an_assignment(lab):
-                return False
-        return True
+        lab_ids = {lab.pk for lab in labs}
+        assigned = self.assignments.filter(lab__in=lab_ids).values_list(
+            'lab_id', flat=True)
+        return lab_ids <= set(assigned)
 
     def get_ta_lab_assignment(self, ta):
-        assignments = self.assignments.all()
-        ta_assignments = []
-        for assignment in assignments:
-            if assignment.ta == ta:
-                ta_assignments.append(assignment)
-        return ta_assignments
+        return list(self.assignments.filter(ta=ta).order_by('pk'))
     def get_lab_object_from_assignment(self, assignment):
         lab_object = assignment.lab
         return lab_object
 
-    """Function: Check if all tas taken in are assigned to a lab"""
-    def all_tas_assigned_to_lab(self, ta_list):
-        if ta_list == []:
-            return True
-        for ta in ta_list:
-            if not self.ta_assigned_to_lab(ta):
-                return False
-        return True
-
-    def get_ta_score_for_lab(self, ta, lab):
-        all_scores = ta.scores.all()
-
-        lab_assignment = self.get_lab_assignment(lab)
-        score_for_lab = all_scores.get(score_catalog_id=lab.catalog_id, semester=lab.semester, schedule_key = lab_assignment.schedule_key)
-        return score_for_lab
-
-    def assign_all_tas_from_list(self, ta_list, lab_list):
-            #loop through the labs
-            contracted_tas = []
-            uncontracted_tas = []
-            for ta in ta_list:
-                if ta.contracted:
-                    contracted_tas.append(ta)
-                else:
-                    uncontracted_tas.append(ta)
-
-            while (not self.all_tas_assigned_to_lab(contracted_tas)
-                   and not self.all_labs_have_assignment(lab_list)):
-                for lab in lab_list:
-                    if not self.all_tas_assigned_to_lab(contracted_tas):
-                        if not self.lab_has_an_assignment(lab):
-                            while not self.lab_has_an_assignment(lab):
-                                # get list of highest scoring tas for lab
-                                highest_scoring_tas = self.get_highest_scoring_tas(contracted_tas, lab)
-                                # if all of the highest scoring tas are already assigned
-                                while self.all_tas_assigned_to_lab(highest_scoring_tas):
-                                    # create new highest scoring ta list with old highest scoreres removed
-                                    new_ta_list = self.remove_tas_from_list(contracted_tas , highest_scoring_tas)
-                                    highest_scoring_tas = self.get_highest_scoring_tas(contracted_tas, lab)
-
-                                #loop through highest scoring tas
-                                if highest_scoring_tas != []:
-                                    for ta in highest_scoring_tas:
-                                        if not self.lab_has_an_assignment(lab):
-                                            #if the ta is not already assigned
-                                            if not self.ta_assigned_to_lab(ta):
-                                                self.assign(ta, lab)
-
-            if not self.all_labs_have_assignment(lab_list):
-                while (not self.all_tas_assigned_to_lab(uncontracted_tas)
-                       and not self.all_labs_have_assignment(lab_list)):
-                    for lab in lab_list:
-                        if not self.all_tas_assigned_to_lab(uncontracted_tas):
-                            if not self.lab_has_an_assignment(lab):
-                                while not self.lab_has_an_assignment(lab):
-                                    # get list of highest scoring tas for lab
-                                    highest_scoring_tas = self.get_highest_scoring_tas(uncontracted_tas, lab)
-
-                                    # if all of the highest scoring tas are already assigned
-                                    while self.all_tas_assigned_to_lab(highest_scoring_tas):
-                                        # create new highest scoring ta list with old highest scoreres removed
-                                        new_ta_list = self.remove_tas_from_list(uncontracted_tas , highest_scoring_tas)
-                                        highest_scoring_tas = self.get_highest_scoring_tas(uncontracted_tas, lab)
-
-                                    #loop through highest scoring tas
-                                    if highest_scoring_tas != []:
-                                        for ta in highest_scoring_tas:
-                                            if not self.lab_has_an_assignment(lab):
-                                                #if the ta is not already assigned
-                                                if not self.ta_assigned_to_lab(ta):
-                                                    self.assign(ta, lab)
-
-            for lab in lab_list:
-                highest_scoring_tas = self.get_highest_scoring_tas(contracted_tas, lab)
-                num_assignments = 1
-                for ta in highest_scoring_tas:
-                    num_assignments = len(self.get_ta_lab_assignment(ta))
-                    if num_assignments < 3:
-                        if not self.lab_has_an_assignment(lab):
-                            self.assign(ta, lab)
-
-            for lab in lab_list:
-                highest_scoring_tas = self.get_highest_scoring_tas(uncontracted_tas, lab)
-                num_assignments = 1
-                for ta in highest_scoring_tas:
-                    num_assignments = len(self.get_ta_lab_assignment(ta))
-                    if num_assignments < 3:
-                        if not self.lab_has_an_assignment(lab):
-                            self.assign(ta, lab)
-
-
-    def remove_tas_from_list(self, ta_list, tas_being_removed):
-        new_ta_list = []
-        for ta in ta_list:
-            for compar_ta in tas_being_removed:
-                if ta != compar_ta:
-                    new_ta_list.append(ta)
-        return new_ta_list
-
-
-    def initialize(self, tas, labs, priority_bonus = 0):
-        """Initialize this template schedule."""
-        # give scores to all given TA's for this template
-        initialization(tas, labs, self.id, priority_bonus)
-
-        self.assign_all_tas_from_list(tas, labs)
+    def solve(self, ta_list, scores, solver='greedy', time_budget=None,
+              capacity=None, decompose=False):
+        """
+        Work out an assignment of the given TA's without saving it.
+
+        solver = name of the engine to use, see optimization.solvers
+        time_budget = seconds the engine may spend, for engines that take
+                      a time budget
+        capacity = labs each TA can still take, their max_labs by default
+        decompose = True to split the TA's and labs into groups that share
+                    no conflict free pair and solve each group on its own,
+                    in settings.SOLVER_WORKERS processes. Labs no TA is free
+                    for are left unassigned.
+
+        Return the assignment array and whether it is proven optimal.
+        """
+        engine = get_engine(solver)
+        contracted = np.array([bool(ta.contracted) for ta in ta_list],
+                              dtype=bool)
+        if capacity is None:
+            capacity = np.array([ta.max_labs for ta in ta_list],
+                                dtype=np.int64)
+        problem = Problem(scores, contracted, capacity)
+
+        if decompose:
+            return solve_components(engine, problem,
+                                    problem.scores > CONFLICT_THRESHOLD,
+                                    settings.SOLVER_WORKERS, time_budget)
+        return engine(problem, time_budget)
+
+    def save_assignment(self, ta_list, lab_list, assignment, pinned=None,
+                        scores=None):
+        """
+        Save an assignment array of the given TA's and labs in bulk.
 
+        pinned = optional boolean array of labs whose assignment is pinned
+        scores = optional (TA, lab) score matrix the assignment was solved
+                 with, the score of every assignment is recorded with it
 
-    def get_highest_scoring_tas(self, tas, lab):
+        A template built on a parent only stores the labs assigned
+        differently from the parent, labs of the parent that are not in
+        lab_list are unassigned.
         """
-        Get the highest scoring TA/TA's for a given lab for this schedule.
-
-        Return a list of all TA's with the highest score for the lab.
-        NOTE: returning list in the event that multiple TA's have the
-              same score
+        if pinned is None:
+            pinned = np.zeros(len(lab_list), dtype=bool)
+        rows = {}
+        for lab_index, (lab, ta_index) in enumerate(zip(lab_list, assignment)):
+            if ta_index < 0:
+                rows[lab.pk] = (None, False, None)
+                continue
+            score = None
+            if scores is not None:
+                score = int(scores[ta_index, lab_index])
+            rows[lab.pk] = (ta_list[ta_index].pk, bool(pinned[lab_index]),
+                            score)
+
+        unassigned = (None, False, None)
+        if self.parent_id is None:
+            rows = {lab_id: row for lab_id, row in rows.items()
+                    if row[0] is not None}
+        else:
+            inherited = {lab_id: (ta_id, pin, score) for lab_id, ta_id, pin,
+                         score in self.parent.assignments.values_list(
+                             'lab_id', 'ta_id', 'pinned', 'score')}
+            for lab_id in inherited:
+                rows.setdefault(lab_id, unassigned)
+            rows = {lab_id: row for lab_id, row in rows.items()
+                    if row != inherited.get(lab_id, unassigned)}
+        self.store_assignments(rows)
+
+    def pinned_assignment(self, previous, tas, labs):
         """
-        # determine the highest score
-        max_score = -99999
-        ta_list = []
-        for ta in tas:
-            for score in ta.scores.filter(score_catalog_id=lab.catalog_id,
-                                          schedule_key=self.id):
-                if score.score > max_score:
-                    max_score = score.score
+        Return the pinned assignments of a previous template.
 
-        # get all the TA's with that score
-        for ta in tas:
-            for score in ta.scores.filter(score_catalog_id=lab.catalog_id,
-                                          schedule_key=self.id):
-                if score.score == max_score:
-                    ta_list.append(ta)
+        Only pins of TA's that are still selected and labs that are still
+        offered are carried over. Other labs are -1 in the returned
+        assignment array.
+        """
+        ta_index = {ta.pk: index for index, ta in enumerate(tas)}
+        lab_index = {lab.pk: index for index, lab in enumerate(labs)}
+
+        assignment = np.full(len(labs), -1, dtype=np.int64)
+        pins = previous.assignments.filter(pinned=True).values_list('lab_id',
+                                                                    'ta_id')
+        for lab_id, ta_id in pins:
+            if ta_id in ta_index and lab_id in lab_index:
+                assignment[lab_index[lab_id]] = ta_index[ta_id]
+        return assignment
+
+    def warm_start(self, previous, tas, labs, scores, assignment=None):
+        """
+        Add the assignments of a previous template that still hold.
+
+        An assignment is kept if its TA is still selected, its lab is still
+        offered, the TA is still free for the lab and the TA's score for the
+        lab is the score recorded when the assignment was made. Stored
+        scores are rescored when a TA changes, so they are not compared.
+        Labs already in the given assignment array are left alone, labs left
+        to solve are -1 in the returned one.
+        """
+        ta_index = {ta.pk: index for index, ta in enumerate(tas)}
+        lab_index = {lab.pk: index for index, lab in enumerate(labs)}
+        capacity = np.array([ta.max_labs for ta in tas], dtype=np.int64)
+
+        if assignment is None:
+            assignment = np.full(len(labs), -1, dtype=np.int64)
+        assignment = assignment.copy()
+        load = np.bincount(assignment[assignment >= 0], minlength=len(tas))
+        for lab_id, ta_id, score in previous.assignments.values_list(
+                'lab_id', 'ta_id', 'score'):
+            if ta_id not in ta_index or lab_id not in lab_index:
+                continue
+            ta, lab = ta_index[ta_id], lab_index[lab_id]
+            # assignments without a recorded score are solved again
+            if (scores[ta, lab] <= CONFLICT_THRESHOLD
+                    or score != scores[ta, lab]):
+                continue
+            if assignment[lab] >= 0 or load[ta] >= capacity[ta]:
+                continue
+            assignment[lab] = ta
+            load[ta] += 1
+        return assignment
+
+    def check_coverage(self, tas, labs, scores, capacity):
+        """
+        Check that the given TA's can cover every given lab without conflicts.
 
-        return ta_list
+        A maximum matching of labs to TA's free for them is worked out,
+        see solvers.max_matching, which is much cheaper than solving.
+        Raise InfeasibleScheduleError naming the labs that cannot be covered
+        and the TA's they compete for.
+        """
+        feasible = scores > CONFLICT_THRESHOLD
+        owner = max_matching(feasible, capacity)
+        if (owner >= 0).all():
+            return
+        lab_indices, ta_indices = hall_violator(feasible, capacity, owner)
+        raise InfeasibleScheduleError([labs[index] for index in lab_indices],
+                                      [tas[index] for index in ta_indices],
+                                      int(capacity[ta_indices].sum()))
+
+    def initialize(self, snapshot, priority_bonus = 0, solver='greedy',
+                   progress=None, time_budget=None, local_search_time=0,
+                   previous=None, warm_start=False, decompose=False,
+                   allow_uncovered=False):
+        """
+        Initialize this template schedule.
+
+        snapshot = the TA's and labs to schedule, see build_snapshot()
+        progress = optional function called with a phase name and a percent
+        time_budget = seconds the engine may spend, see solve()
+        local_search_time = seconds spent swapping TA's between labs after
+                            solving, 0 (the default) keeps the engine's
+                            assignment as it is
+        previous = optional template schedule this one replaces, its pinned
+                   assignments are copied over as they are
+        warm_start = True to also keep the assignments of previous that
+                     still hold, see warm_start()
+        decompose = True to solve independent groups of TA's and labs on
+                    their own, see solve()
+        allow_uncovered = True to generate even if some labs cannot be
+                          covered, see check_coverage()
+
+        Only the labs left over are solved, by the TA's with room left.
+        The objective value reached and whether it is proven optimal are
+        recorded on the schedule, the caller saves it. TA's, labs and class
+        times come from the snapshot, the only reads between scoring and
+        saving are the assignments of previous and the parent's scores.
+        """
+        tas = snapshot.tas
+        labs = snapshot.labs
 
-    def assign(self, ta, lab):
-        """Create a new assignment for a TA in the template schedule."""
-        # if there is a TA already assigned to the desired lab,
-        # unassign them first
-        self.unassign(lab)
+        # give scores to all given TA's for this template
+        if progress is not None:
+            progress('Scoring TA\'s', 10)
+        self.priority_bonus = priority_bonus
+        lab_scores = build_score_matrix(tas, labs, priority_bonus,
+                                        class_times=snapshot.class_times())
+
+        # start from the pinned assignments and, when warm starting, the
+        # previous assignments that still hold
+        assignment = np.full(len(labs), -1, dtype=np.int64)
+        if previous is not None:
+            assignment = self.pinned_assignment(previous, tas, labs)
+        pinned = assignment >= 0
+        if previous is not None and warm_start:
+            assignment = self.warm_start(previous, tas, labs, lab_scores,
+                                         assignment)
+        fixed = assignment >= 0
+        capacity = snapshot.capacity - np.bincount(assignment[fixed],
+                                                   minlength=len(tas))
+
+        # fixed labs and TA's with no room left are taken out of the problem
+        open_tas = np.flatnonzero(capacity > 0)
+        open_labs = np.flatnonzero(~fixed)
+
+        # fail before storing scores or solving if labs would be left over
+        open_tas_list = [tas[index] for index in open_tas]
+        if not allow_uncovered:
+            self.check_coverage(open_tas_list,
+                                [labs[index] for index in open_labs],
+                                lab_scores[np.ix_(open_tas, open_labs)],
+                                capacity[open_tas])
+
+        # store the scores of this template, unless they are the same as
+        # its parent's
+        if not self.has_parent_scores(tas, labs, lab_scores):
+            save_scores(tas, labs, lab_scores, self.id, replace=True)
+
+        if progress is not None:
+            progress('Assigning TA\'s', 60)
+        solved, is_optimal = self.solve(
+            open_tas_list, lab_scores[np.ix_(open_tas, open_labs)], solver,
+            time_budget, capacity[open_tas], decompose)
+        assignment[open_labs] = np.where(solved >= 0, open_tas[solved], -1)
+
+        # kept assignments were not solved for, so nothing is proven, pins
+        # are part of the problem the LO asked for
+        is_optimal = is_optimal and not (fixed & ~pinned).any()
+
+        # swap TA's between labs wherever it raises the total score, the
+        # same switches the LO would otherwise make by hand
+        if not is_optimal and local_search_time > 0:
+            if progress is not None:
+                progress('Improving assignments', 80)
+            assignment = local_search(lab_scores, assignment,
+                                      local_search_time, fixed)
+
+        self.save_assignment(tas, labs, assignment, pinned, lab_scores)
+
+        # the objective is the total score of every assigned lab
+        assigned = np.flatnonzero(assignment >= 0)
+        self.objective = int(lab_scores[assignment[assigned], assigned].sum())
+        self.is_optimal = is_optimal
+
+
+    def has_parent_scores(self, tas, labs, scores):
+        """Check if the parent of this template holds exactly these scores."""
+        if self.parent_id is None:
+            return False
+        matrix = score_matrix_for(self.parent_id)
+        if matrix is None:
+            return False
+        stored_tas, stored_labs = matrix.decode()[:2]
+        if len(stored_tas) != len(tas) or len(stored_labs) != len(labs):
+            return False
+        stored, found = matrix.lookup([ta.pk for ta in tas],
+                                      [lab.pk for lab in labs])
+        scores = np.clip(scores, ScoreMatrix.MIN_SCORE, ScoreMatrix.MAX_SCORE)
+        return bool(found.all() and (stored == scores).all())
+
+    def assign(self, ta, lab, pinned=False):
+        """
+        Create a new assignment for a TA in the template schedule.
 
-        # create a new assignment object
-        new_assignment = TemplateAssignment.objects.create(lab=lab,
-                                                           ta=ta,
-                                                           schedule_key=self.pk)
-        new_assignment.save()
+        pinned = True to keep the assignment in regenerated versions
+        """
+        # a TA already assigned to the desired lab is replaced
+        self.copy_on_write()
+        TemplateAssignment.objects.update_or_create(
+            schedule=self, lab=lab,
+            defaults={'ta': ta, 'pinned': pinned,
+                      'score': self.current_score(ta, lab)})
+        clear_flattened_assignments()
+
+    def bulk_assign(self, assignments, pinned=False):
+        """
+        Create many assignments in the template schedule at once.
 
-        # add the new object to the existing field
-        self.assignments.add(new_assignment)
+        Takes a list of (ta, lab) tuples, of objects or snapshot rows. Any
+        TA already assigned to one of those labs is unassigned first.
 
-        # save changes
-        self.save()
+        pinned = True to keep the assignments in regenerated versions
+        """
+        # only primary keys are used, so snapshot rows work as well as
+        # TA and Lab objects
+        self.store_assignments({lab.pk: (ta.pk, pinned, None)
+                                for ta, lab in assignments})
 
     def unassign(self, lab):
         """Remove the assigned TA from the selected lab."""
-        for assignment in self.assignments.all():
-            if assignment.lab == lab:
-                assignment.delete()
-                self.assignments.remove(assignment)
-                self.save()
-                return True
-        return False
+        if not self.lab_has_an_assignment(lab):
+            return False
+        if self.parent_id is None:
+            self.copy_on_write()
+            self.own_assignments.filter(lab=lab).delete()
+            clear_flattened_assignments()
+        else:
+            # the lab stays assigned in the parent
+            self.store_assignments({lab.pk: (None, False, None)})
+        return True
 
     def swap_assignments(self, from_assignment, to_assignment):
-        """Swap two TA's assignments in this template."""
-        temp_ta = to_assignment.ta
-        to_assignment.ta = from_assignment.ta
-        from_assignment.ta = temp_ta
-        to_assignment.save()
-        from_assignment.save()
+        """
+        Swap two TA's assignments in this template.
+
+        The assignments may be inherited from the parent, the swapped ones
+        are stored in this template either way. A pin stays with its TA, so
+        a pinned TA moved to the other lab is pinned there.
+        """
+        self.copy_on_write()
+        swapped = ((from_assignment, to_assignment.ta, to_assignment.pinned),
+                   (to_assignment, from_assignment.ta, from_assignment.pinned))
+        for assignment, ta, pinned in swapped:
+            assignment.ta = ta
+            assignment.pinned = pinned
+            TemplateAssignment.objects.update_or_create(
+                schedule=self, lab_id=assignment.lab_id,
+                defaults={'ta': ta, 'pinned': pinned,
+                          'score': self.current_score(ta, assignment.lab)})
+        clear_flattened_assignments()
+
+    def unpin(self, lab):
+        """
+        Let regenerated versions solve the given lab again.
+
+        The TA stays assigned to the lab in this template. Return False if
+        the lab has no pinned assignment.
+        """
+        assignment = self.get_lab_assignment(lab)
+        if assignment is None or not assignment.pinned:
+            return False
+        self.store_assignments({lab.pk: (assignment.ta_id, False,
+                                         assignment.score)})
+        return True
+
+    def current_score(self, ta, lab):
+        """Return the stored score of a TA for a lab, None if unscored."""
+        matrix = score_matrix_for(self.pk)
+        if ta is None or lab is None or matrix is None:
+            return None
+        return matrix.score(ta.pk, lab.pk)
 
     def get_assignment_from_id(self, course_id):
         """Get an assignment based on a given course ID."""
-        for assignment in self.assignments.all():
-            if assignment.lab.course_id == course_id:
-                return assignment
+        return self.assignments.filter(lab__course_id=course_id).first()
 
     def has_one_assignment(self):
         """Check if this template has at least one TA assigned to a lab."""
-        for assignment in self.assignments.all():
-            if assignment.ta is not None:
-                return True
-        return False
+        return self.assignments.exclude(ta=None).exists()
 
     def get_semester(self):
         """Get the semester this schedule is for."""
@@ -258,7 +574,266 @@ class TemplateSchedule(models.Model):
     version_number = models.IntegerField('Schedule Version', default=0)
     semester = models.ForeignKey(Semester, on_delete=models.CASCADE,
                                  blank=True, null=True)
-    assignments = models.ManyToManyField(TemplateAssignment, blank=True)
+
+    # version this template was built on, its assignments and scores are
+    # read through the parent. delete() flattens the templates built on a
+    # parent first, a QuerySet delete of a parent without its children is
+    # refused.
+    parent = models.ForeignKey('self', on_delete=models.RESTRICT,
+                               blank=True, null=True, related_name='children')
+
+    # total score of the assignments made by the solver, and whether the
+    # solver proved no better assignment exists
+    objective = models.IntegerField('Objective value', blank=True, null=True)
+    is_optimal = models.BooleanField('Proven optimal', default=False)
+
+    # bonus the scores of this template were calculated with, so a single
+    # TA can be rescored the same way later on
+    priority_bonus = models.IntegerField('Priority bonus', default=0)
+
+
+class ScoreMatrix(models.Model):
+    """
+    The scores of a template schedule, stored as one binary matrix.
+
+    scores holds an int16 (TA, lab) matrix, row by row, and ta_ids and
+    lab_ids the primary keys of its rows and columns. Scores are clipped to
+    the int16 range, entries never scored hold MISSING_SCORE. Reading the
+    matrix does not copy it, see decode(). digest identifies the content of
+    a version, for the file cache in score_cache.
+    """
+
+    # dtypes of the stored bytes, little endian on every platform
+    ID_DTYPE = score_cache.ID_DTYPE
+    SCORE_DTYPE = score_cache.SCORE_DTYPE
+    MISSING_SCORE = -2 ** 15
+    MIN_SCORE = -2 ** 15 + 1
+    MAX_SCORE = 2 ** 15 - 1
+
+    def __str__(self):
+        """Define human readable object name."""
+        return f'Scores of {self.template}, v{self.version}'
+
+    def decode(self):
+        """
+        Return the TA primary keys, lab primary keys and score matrix.
+
+        The arrays are read only views of the stored bytes, or of the
+        cached file of this version when there is one, see score_cache.
+        Without a cached file, the bytes are loaded if they were deferred
+        and the file is written for the next reader.
+        """
+        if getattr(self, '_decoded', None) is None:
+            decoded = score_cache.read(self.template_id, self.version,
+                                       self.digest)
+            if decoded is None:
+                blobs = {'ta_ids', 'lab_ids', 'scores'}
+                deferred = blobs & self.get_deferred_fields()
+                if deferred:
+                    self.refresh_from_db(fields=list(deferred))
+                ta_ids = np.frombuffer(self.ta_ids, dtype=self.ID_DTYPE)
+                lab_ids = np.frombuffer(self.lab_ids, dtype=self.ID_DTYPE)
+                scores = np.frombuffer(self.scores, dtype=self.SCORE_DTYPE)
+                decoded = (ta_ids, lab_ids,
+                           scores.reshape(len(ta_ids), len(lab_ids)))
+                score_cache.write(self.template_id, self.version,
+                                  self.digest, *decoded)
+            ta_ids, lab_ids = decoded[:2]
+            self._decoded = decoded
+            self._ta_index = {pk: index
+                              for index, pk in enumerate(ta_ids.tolist())}
+            self._lab_index = {pk: index
+                               for index, pk in enumerate(lab_ids.tolist())}
+        return self._decoded
+
+    def has_ta(self, ta_id):
+        """Check if a TA was scored in this matrix."""
+        self.decode()
+        return ta_id in self._ta_index
+
+    def score(self, ta_id, lab_id):
+        """Return the score of a TA for a lab, None if it was not scored."""
+        scores = self.decode()[2]
+        row = self._ta_index.get(ta_id)
+        column = self._lab_index.get(lab_id)
+        if row is None or column is None:
+            return None
+        score = int(scores[row, column])
+        if score == self.MISSING_SCORE:
+            return None
+        return score
+
+    def lookup(self, ta_ids, lab_ids):
+        """
+        Return the scores of the given TA's for the given labs.
+
+        Return a (TA, lab) integer matrix and a boolean matrix of which
+        entries were scored, unscored entries being 0.
+        """
+        stored_tas, stored_labs, stored = self.decode()
+        rows = np.array([self._ta_index.get(pk, -1) for pk in ta_ids],
+                        dtype=np.int64)
+        columns = np.array([self._lab_index.get(pk, -1) for pk in lab_ids],
+                           dtype=np.int64)
+        if not len(stored_tas) or not len(stored_labs):
+            shape = (len(rows), len(columns))
+            return np.zeros(shape, dtype=np.int64), np.zeros(shape, dtype=bool)
+
+        values = stored[np.ix_(np.maximum(rows, 0), np.maximum(columns, 0))]
+        found = ((rows >= 0)[:, None] & (columns >= 0)[None, :]
+                 & (values != self.MISSING_SCORE))
+        return np.where(found, values, 0).astype(np.int64), found
+
+    def copy_to(self, template_id):
+        """Store a copy of this matrix as the scores of another template."""
+        ta_ids, lab_ids, scores = self.decode()
+        return ScoreMatrix.objects.create(
+            template_id=template_id, ta_ids=ta_ids.tobytes(),
+            lab_ids=lab_ids.tobytes(), scores=scores.tobytes(), version=1,
+            digest=self.digest)
+
+    @classmethod
+    def store(cls, template_id, ta_ids, lab_ids, scores, replace=False):
+        """
+        Write the scores of the given TA's for the given labs.
+
+        Scores already stored for other TA's or labs of the template are
+        kept, TA's and labs new to the matrix are added to it. A template
+        sharing its parent's scores gets its own copy to write into. The
+        version goes up by one with every write and the cached files of
+        older versions are removed once the write is committed.
+
+        replace = True to drop every score stored or shared before
+
+        Return the updated ScoreMatrix.
+        """
+        ta_ids = list(ta_ids)
+        lab_ids = list(lab_ids)
+        scores = np.clip(np.asarray(scores), cls.MIN_SCORE, cls.MAX_SCORE)
+        scores = scores.reshape(len(ta_ids), len(lab_ids))
+
+        with transaction.atomic():
+            matrix = cls.objects.select_for_update().filter(
+                template_id=template_id).first()
+            shared = matrix or score_matrix_for(template_id)
+
+            # templates built on this one keep the scores they read so far
+            if shared is not None:
+                for child_id in TemplateSchedule.objects.filter(
+                        parent_id=template_id,
+                        score_matrix__isnull=True).values_list('pk',
+                                                               flat=True):
+                    shared.copy_to(child_id)
+
+            if matrix is None:
+                matrix = cls(template_id=template_id, version=0)
+            if shared is None or replace:
+                old_tas, old_labs = [], []
+                old = np.zeros((0, 0), dtype=cls.SCORE_DTYPE)
+            else:
+                old_tas, old_labs, old = shared.decode()
+                old_tas, old_labs = old_tas.tolist(), old_labs.tolist()
+
+            # new TA's and labs are added after the ones already stored
+            ta_index = {pk: index for index, pk in enumerate(old_tas)}
+            for pk in ta_ids:
+                ta_index.setdefault(pk, len(ta_index))
+            lab_index = {pk: index for index, pk in enumerate(old_labs)}
+            for pk in lab_ids:
+                lab_index.setdefault(pk, len(lab_index))
+            all_tas = list(ta_index)
+            all_labs = list(lab_index)
+
+            merged = np.full((len(all_tas), len(all_labs)), cls.MISSING_SCORE,
+                             dtype=cls.SCORE_DTYPE)
+            merged[:len(old_tas), :len(old_labs)] = old
+            merged[np.ix_([ta_index[pk] for pk in ta_ids],
+                          [lab_index[pk] for pk in lab_ids])] = scores
+
+            matrix.ta_ids = np.array(all_tas, dtype=cls.ID_DTYPE).tobytes()
+            matrix.lab_ids = np.array(all_labs, dtype=cls.ID_DTYPE).tobytes()
+            matrix.scores = merged.tobytes()
+            matrix.digest = hashlib.blake2b(
+                matrix.ta_ids + matrix.lab_ids + matrix.scores,
+                digest_size=16).hexdigest()
+            matrix.version += 1
+            matrix._decoded = None
+            matrix.save()
+            transaction.on_commit(lambda: score_cache.remove(template_id))
+
+        # templates sharing these scores read them through this one
+        clear_score_matrices()
+        return matrix
+
+    template = models.OneToOneField(TemplateSchedule, on_delete=models.CASCADE,
+                                    related_name='score_matrix')
+    ta_ids = models.BinaryField('TA primary keys')
+    lab_ids = models.BinaryField('Lab primary keys')
+    scores = models.BinaryField('Scores')
+    version = models.PositiveIntegerField('Version', default=0)
+    digest = models.CharField('Digest', max_length=32, blank=True,
+                              default='')
+
+
+# score matrices read during the current request, by template
+_score_matrices = threading.local()
+
+
+def _cached_matrices():
+    """Return the score matrices cached in this thread."""
+    if not hasattr(_score_matrices, 'by_template'):
+        _score_matrices.by_template = {}
+    return _score_matrices.by_template
+
+
+def score_matrix_for(template_id):
+    """
+    Return the ScoreMatrix of a template, None if it has no scores.
+
+    A template without scores of its own shares the scores of its parent.
+    The matrix is loaded and decoded once per request, see
+    clear_score_matrices. Only its version is queried when the scores of
+    that version are already cached on disk, see score_cache.
+    """
+    matrices = _cached_matrices()
+    if template_id not in matrices:
+        matrix = ScoreMatrix.objects.defer(
+            'ta_ids', 'lab_ids', 'scores').filter(
+                template_id=template_id).first()
+        if matrix is None:
+            parent_id = TemplateSchedule.objects.filter(
+                pk=template_id).values_list('parent_id', flat=True).first()
+            if parent_id is not None:
+                matrix = score_matrix_for(parent_id)
+        matrices[template_id] = matrix
+    return matrices[template_id]
+
+
+def clear_score_matrices(**kwargs):
+    """Drop every cached score matrix, done when a request starts."""
+    _cached_matrices().clear()
+
+
+# assignments in effect in the templates read during the current request,
+# see TemplateSchedule.assignment_ids
+_flattened_assignments = threading.local()
+
+
+def _cached_assignment_ids():
+    """Return the assignment primary keys cached in this thread."""
+    if not hasattr(_flattened_assignments, 'by_template'):
+        _flattened_assignments.by_template = {}
+    return _flattened_assignments.by_template
+
+
+def clear_flattened_assignments(**kwargs):
+    """
+    Drop every cached set of assignments, done when a request starts.
+
+    Templates are read through their parents, so the whole cache is
+    dropped whenever any assignment changes.
+    """
+    _cached_assignment_ids().clear()
 
 
 class History(models.Model):
@@ -279,3 +854,121 @@ class History(models.Model):
 
     temp_sched = models.ForeignKey(TemplateSchedule, on_delete=models.CASCADE, related_name='his_nodes', null=True)
     relative_node_id = models.IntegerField(null=True)
+
+
+class ScheduleJob(models.Model):
+    """
+    A request to generate a template schedule, queued for a worker.
+
+    Jobs are picked up by the run_schedule_jobs management command, which
+    records their progress here for the dashboard to poll. A running job
+    whose worker stopped is failed once it has not made progress for
+    settings.SCHEDULE_JOB_TIMEOUT seconds, see fail_stale().
+    """
+
+    QUEUED = 'queued'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+
+    STATUSES = (
+        (QUEUED, 'Queued'),
+        (RUNNING, 'Running'),
+        (DONE, 'Done'),
+        (FAILED, 'Failed'),
+    )
+
+    def __str__(self):
+        """Define human readable object name."""
+        return f'{self.semester}, {self.status}'
+
+    def get_ta_ids(self):
+        """Return the student IDs of the selected TA's, in order."""
+        if not self.ta_ids:
+            return []
+        return self.ta_ids.split(',')
+
+    def claim(self):
+        """
+        Mark this job as running, if no other worker has done so.
+
+        Return True if this worker now owns the job.
+        """
+        started = timezone.now()
+        claimed = ScheduleJob.objects.filter(
+            pk=self.pk, status=self.QUEUED).update(status=self.RUNNING,
+                                                   started=started,
+                                                   heartbeat=started)
+        if claimed:
+            self.status = self.RUNNING
+            self.started = started
+            self.heartbeat = started
+        return bool(claimed)
+
+    @classmethod
+    def fail_stale(cls, timeout):
+        """
+        Fail the running jobs that made no progress for timeout seconds.
+
+        Their worker is taken to have crashed, the jobs are not run again
+        since they may crash the next worker as well. Return the number of
+        jobs failed.
+        """
+        now = timezone.now()
+        return cls.objects.filter(
+            status=cls.RUNNING,
+            heartbeat__lt=now - timedelta(seconds=timeout)).update(
+                status=cls.FAILED, finished=now,
+                message='The worker running this job stopped, please '
+                        'generate the schedule again.')
+
+    def set_progress(self, phase, percent):
+        """Record which phase the job is in and how far along it is."""
+        self.phase = phase
+        self.percent = percent
+        self.heartbeat = timezone.now()
+        self.save(update_fields=['phase', 'percent', 'heartbeat'])
+
+    def get_elapsed(self):
+        """Return the seconds this job has been running for."""
+        if self.started is None:
+            return 0
+        finished = self.finished or timezone.now()
+        return (finished - self.started).total_seconds()
+
+    def is_finished(self):
+        """Check if this job is done or has failed."""
+        return self.status in (self.DONE, self.FAILED)
+
+    semester = models.ForeignKey(Semester, on_delete=models.CASCADE)
+
+    # stored as a comma delimited list of student IDs, in selection order
+    ta_ids = models.TextField('Selected TA\'s', blank=True)
+    priority_bonus = models.IntegerField('Priority bonus', default=0)
+    solver = models.CharField('Solver', max_length=20, default='greedy')
+    time_budget = models.FloatField('Time budget (seconds)', blank=True,
+                                    null=True)
+    warm_start = models.BooleanField('Warm start', default=False)
+    decompose = models.BooleanField('Solve independent groups apart',
+                                    default=False)
+    allow_uncovered = models.BooleanField('Allow uncovered labs',
+                                          default=False)
+    local_search = models.BooleanField('Improve with swaps', default=False)
+
+    status = models.CharField('Status', max_length=10, choices=STATUSES,
+                              default=QUEUED)
+    phase = models.CharField('Phase', max_length=50, blank=True)
+    percent = models.PositiveSmallIntegerField('Percent done', default=0)
+    message = models.TextField('Error message', blank=True)
+
+    created = models.DateTimeField(auto_now_add=True)
+    started = models.DateTimeField(blank=True, null=True)
+    finished = models.DateTimeField(blank=True, null=True)
+
+    # last time the worker reported progress on this job
+    heartbeat = models.DateTimeField(blank=True, null=True)
+
+    # the generated schedule, once the job is done
+    template_schedule = models.ForeignKey(TemplateSchedule,
+                                          on_delete=models.SET_NULL,
+                                          blank=True, null=True)
@@ -1,73 +1,178 @@
 """Primary optimization function/functions."""
+import numpy as np
+from django.conf import settings
+from teachingassistant.models import ClassTime
+from laborganizer.time_slots import EMPTY_MASK
+from optimization.parallel_scoring import sharded_conflicts
 
 
-def calculate_score(ta, lab, template_id, priority_bonus=0):
-    """Calculate the score for a TA for a given lab."""
-    total_score = 0
+# score removed from a TA for every one of their classes that overlaps a lab
+CONFLICT_PENALTY = 999
 
-    ta_experience = ta.get_experience()
+# a TA scoring at or below this for a lab has a class during it, as long as
+# their experience bonuses add up to less than this
+CONFLICT_THRESHOLD = -(CONFLICT_PENALTY // 2)
 
-    ta_availability = ta.get_availability()
 
-    # check if the TA has experience in teaching the lab
-    for experience in ta_experience:
-        experience_subject = experience[0]
-        experience_id = experience[1]
-        if (experience_subject == lab.subject
-            and experience_id == lab.catalog_id):
-            total_score += priority_bonus
+def save_scores(tas, labs, scores, template_id, replace=False):
+    """
+    Store a full score matrix for a template.
 
-    # check if the TA has the availability to teach the lab
-    for time in ta_availability.values():
-        if not available(lab, time):
-            total_score -= 999
+    The scores are written into the template's ScoreMatrix in one query,
+    scores of TA's and labs not given are kept as they are unless replace
+    is True.
+    """
+    # imported here, optimization.models imports this module
+    from optimization.models import ScoreMatrix
+    ScoreMatrix.store(template_id, [ta.pk for ta in tas],
+                      [lab.pk for lab in labs], scores, replace)
 
-    # assign the score to a TA object
-    ta.assign_score(total_score, lab, template_id)
 
+def build_score_matrix(tas, labs, priority_bonus=0, workers=None,
+                       class_times=None):
+    """
+    Calculate the score of every TA for every lab in one pass.
 
-def initialization(tas, labs, template_id, priority_bonus=0):
+    Return a NumPy array of shape (len(tas), len(labs)) where index [i, j]
+    is the score of tas[i] for labs[j]: priority_bonus for every matching
+    experience entry and CONFLICT_PENALTY removed for every TA class time
+    overlapping the lab.
+
+    workers = number of processes the TA's are split over to count their
+              conflicts, settings.SCORING_WORKERS by default
+    class_times = class time masks of every TA when they are already
+                  loaded (see snapshot.py), otherwise they are queried
+    """
+    labs = list(labs)
+    if class_times is None:
+        class_times = class_time_masks(tas)
+    if workers is None:
+        workers = settings.SCORING_WORKERS
+
+    # labs of the same course held at the same times score the same, and so
+    # do TA's with the same class times and experience, so only one lab and
+    # one TA of each group are scored
+    group_labs, lab_inverse = lab_groups(labs)
+    first_tas, ta_inverse = ta_profiles(tas, class_times)
+    experience = experience_matrix([tas[index] for index in first_tas],
+                                   group_labs)
+    conflicts = conflict_counts([class_times[index] for index in first_tas],
+                                group_labs, workers)
+    scores = experience * priority_bonus - conflicts * CONFLICT_PENALTY
+
+    # give every TA and lab the scores of its group
+    return scores[np.ix_(ta_inverse, lab_inverse)]
+
+
+def lab_groups(labs):
     """
-    Primary initialization function for all TA scores.
+    Group labs that are bound to score the same for every TA.
 
-    Given a list of TA's and labs, assign a score to each TA for each Lab.
+    Labs share a group when they have the same subject, catalog ID and
+    weekly time slots (days, start and end time). Return the first lab of
+    every group and the index of each lab's group.
     """
-    # calculate all scores
-    for lab in labs:
-        for ta in tas:
-            calculate_score(ta, lab, template_id, priority_bonus)
+    keys, inverse = _unique_inverse([(lab.subject, lab.catalog_id,
+                                      bytes(lab.time_slots or EMPTY_MASK))
+                                     for lab in labs])
+    first_labs = {}
+    for lab, group in zip(labs, inverse):
+        first_labs.setdefault(group, lab)
+    return [first_labs[group] for group in range(len(keys))], inverse
 
 
-def recalc_scores(ta, labs):
-    """Calculate scores for all labs for a single TA."""
-    for lab in labs:
-        calculate_score(ta, lab)
+def experience_matrix(tas, labs):
+    """
+    Count how many times each TA lists each lab's course as experience.
 
+    Return an integer array of shape (len(tas), len(labs)).
+    """
+    # index every distinct (subject, catalog ID) pair found in the labs
+    course_index = {}
+    lab_courses = np.empty(len(labs), dtype=np.int64)
+    for lab_index, lab in enumerate(labs):
+        course = (lab.subject, lab.catalog_id)
+        lab_courses[lab_index] = course_index.setdefault(course,
+                                                         len(course_index))
+
+    # count the experience of every TA per course
+    counts = np.zeros((len(tas), len(course_index)), dtype=np.int64)
+    for ta_index, ta in enumerate(tas):
+        for experience in ta.get_experience():
+            if experience in course_index:
+                counts[ta_index, course_index[experience]] += 1
+
+    # expand the course counts to one column per lab
+    return counts[:, lab_courses]
+
+
+def ta_profiles(tas, class_times):
+    """
+    Group TA's that are bound to score the same for every lab.
 
-def available(lab, ta_time):
+    TA's share a group when they have the same class times and the same
+    experience. class_times holds the class time masks of each TA, see
+    class_time_masks(). Return the index of the first TA of every group and
+    the index of each TA's group.
+    """
+    keys, inverse = _unique_inverse([(tuple(sorted(times)),
+                                      tuple(sorted(ta.get_experience())))
+                                     for ta, times in zip(tas, class_times)])
+    first_tas = {}
+    for index, group in enumerate(inverse):
+        first_tas.setdefault(group, index)
+    return [first_tas[group] for group in range(len(keys))], inverse
+
+
+def class_time_masks(tas):
+    """Return the weekly masks of each TA's class times, in one query."""
+    masks = [[] for ta in tas]
+    ta_index = {}
+    for index, ta in enumerate(tas):
+        if ta.availability_key is not None:
+            ta_index[ta.availability_key] = index
+    class_times = ClassTime.objects.filter(
+        availability__pk__in=list(ta_index)).values_list(
+            'availability__pk', 'time_slots')
+    for availability_key, time_slots in class_times:
+        masks[ta_index[availability_key]].append(
+            bytes(time_slots or EMPTY_MASK))
+    return masks
+
+
+def conflict_counts(class_times, labs, workers=1):
     """
-    Check if the time of a lab and the availability of a TA overlap.
+    Count the class times in each list of class_times that overlap each lab.
 
-    NOTE: The TA time is when the TA IS UNAVAILABLE
+    Return an integer array of shape (len(class_times), len(labs)). The
+    lists can be split over several worker processes, see
+    parallel_scoring.sharded_conflicts.
     """
-    lab_days = lab.get_days()
-    ta_days = ta_time['days']
-    ta_start_time = ta_time['start_time']
-    ta_end_time = ta_time['end_time']
-    # if at least one of the lab days is within the ta days, check if the times
-    # overlap
-    if bool(set(lab_days) & set(ta_days)):
-        # check for time overlap
-
-        # TA class starts during the lab
-        if ((ta_start_time >= lab.start_time and ta_start_time <= lab.end_time)
-            # TA class ends during a lab
-            or (ta_end_time >= lab.start_time and ta_end_time <= lab.end_time)
-            # lab starts during TA class
-            or (lab.start_time >= ta_start_time and lab.start_time <= ta_end_time)
-            # lab ends during TA class
-            or (lab.end_time >= ta_start_time and lab.end_time <= ta_end_time)):
-            # times overlap, return false
-            return False
-    # times do not overlap or do not share a day, return true
-    return True
+    owners = np.array([index for index, times in enumerate(class_times)
+                       for time in times], dtype=np.int64)
+    if not len(owners) or not labs:
+        return np.zeros((len(class_times), len(labs)), dtype=np.int64)
+
+    # compare each distinct class time mask with each distinct lab mask once
+    time_masks, time_inverse = _unique_masks([time for times in class_times
+                                              for time in times])
+    lab_masks, lab_inverse = _unique_masks([lab.time_slots for lab in labs])
+
+    # add up the overlapping class times of each TA
+    return sharded_conflicts(len(class_times), owners, time_masks,
+                             time_inverse, lab_masks, lab_inverse, workers)
+
+
+def _unique_masks(masks):
+    """Return the distinct masks as rows of 32 bit words, and their index."""
+    keys, inverse = _unique_inverse([bytes(mask or EMPTY_MASK)
+                                     for mask in masks])
+    words = np.frombuffer(b''.join(keys), dtype='<u4')
+    return words.reshape(len(keys), -1), inverse
+
+
+def _unique_inverse(values):
+    """Return the distinct values and the index of each value in them."""
+    keys = {}
+    inverse = [keys.setdefault(value, len(keys)) for value in values]
+    return list(keys), np.array(inverse, dtype=np.int64)
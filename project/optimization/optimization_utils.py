@@ -1,20 +1,60 @@
 """Utility functions for the greater optimization functionality."""
-from laborganizer.models import Semester
-from .models import TemplateSchedule
-from laborganizer.lo_utils import (get_most_recent_sched)
+from django.conf import settings
+from django.db.models import OuterRef, Subquery
+from django.utils import timezone
+from laborganizer.models import Semester, Lab, LOCache
+from teachingassistant.models import TA
+from .models import (TemplateSchedule, ScheduleJob, InfeasibleScheduleError,
+                     score_matrix_for)
+from .optimization_primary import build_score_matrix, save_scores
+from .snapshot import build_snapshot
+from .solvers import get_engine
+from laborganizer.lo_utils import (get_most_recent_sched,
+                                   get_labs_by_semester)
 
 
-def generate_by_selection(tas, labs, semester, priority_bonus=0):
+def generate_by_selection(tas, labs, semester, priority_bonus=0,
+                          solver='greedy', progress=None, time_budget=None,
+                          local_search_time=0, warm_start=False,
+                          decompose=False, allow_uncovered=False):
     """
     Generate a template schedule based on LO TA selection.
 
-    tas = Python list
+    tas = TA objects or primary keys, in the order they were selected
     labs = QuerySet
+    solver = name of the engine to use, see optimization.solvers.engines:
+             'greedy' (the original behavior), 'hungarian' (optimal, one
+             lab per TA at a time), 'flow' (optimal over every TA's labs),
+             'anytime' (improves on greedy until optimal or out of time)
+             or 'local_search' (greedy followed by swaps)
+    progress = optional function called with a phase name and a percent
+    time_budget = seconds the engine may spend, the 'anytime' engine keeps
+                  the best assignment found so far once the time is up
+    local_search_time = seconds spent swapping TA's between labs once
+                        solved, 0 (the default) to skip
+    warm_start = True to keep the assignments of the most recent template
+                 schedule that still hold and only solve the other labs
+    decompose = True to split the problem into groups of TA's and labs that
+                share no conflict free pair, solved on their own
+    allow_uncovered = True to generate even if the selected TA's cannot
+                      cover every lab without conflicts, otherwise
+                      InfeasibleScheduleError is raised before solving
+
+    Pinned assignments of the most recent template schedule are always
+    carried over. The TA's and labs are loaded once into a snapshot, see
+    optimization.snapshot, and nothing else is queried for them. With
+    settings.TEMPLATE_DELTAS, the new template is built on the most recent
+    one and only stores what differs from it.
+
+    Return the new template schedule.
     """
+    # fail on an unknown engine before creating anything
+    get_engine(solver)
+
     # get the most recent semester template schedule and increment the
     # version number by one for the new template schedule
-    new_version = get_most_recent_sched(semester['time'],
-                                        semester['year']).version_number + 1
+    most_recent = get_most_recent_sched(semester['time'], semester['year'])
+    new_version = most_recent.version_number + 1
 
     print(semester['time'], semester['year'])
 
@@ -25,14 +65,123 @@ def generate_by_selection(tas, labs, semester, priority_bonus=0):
     # for the selected semester
     new_template_schedule = TemplateSchedule.objects.create(
         version_number=new_version,
-        semester=semester)
+        semester=semester,
+        parent=most_recent if settings.TEMPLATE_DELTAS else None)
 
-    # assign scores to all given TA's for given Labs
-    new_template_schedule.initialize(tas, labs, priority_bonus)
+    # assign scores to all given TA's for given Labs, a schedule that could
+    # not be generated is not kept as a new version
+    snapshot = build_snapshot(tas, labs)
+    try:
+        new_template_schedule.initialize(snapshot, priority_bonus, solver,
+                                         progress, time_budget,
+                                         local_search_time, most_recent,
+                                         warm_start, decompose,
+                                         allow_uncovered)
+    except InfeasibleScheduleError:
+        new_template_schedule.delete()
+        raise
 
     # save new template to databse
     new_template_schedule.save()
 
+    return new_template_schedule
+
+
+def run_schedule_job(job):
+    """
+    Generate the template schedule of a claimed ScheduleJob.
+
+    The job's progress, result and any error are saved on the job. Once the
+    schedule is generated, the LO cache is pointed at it.
+    """
+    semester = {
+        'time': job.semester.semester_time,
+        'year': job.semester.year,
+    }
+
+    try:
+        # gather the selected TA's in the order they were selected
+        ta_ids = job.get_ta_ids()
+        found = dict(TA.objects.filter(student_id__in=ta_ids).values_list(
+            'student_id', 'pk'))
+        tas = [found[ta_id] for ta_id in ta_ids if ta_id in found]
+
+        labs = get_labs_by_semester(semester['time'], semester['year'])
+
+        # jobs queued without a time limit get the default one
+        time_budget = job.time_budget
+        if time_budget is None:
+            time_budget = settings.SOLVER_TIME_BUDGET
+        # swaps only run when the LO asks for them, engines are kept as
+        # they are otherwise
+        local_search_time = 0
+        if job.local_search:
+            local_search_time = settings.LOCAL_SEARCH_TIME
+        template_schedule = generate_by_selection(tas, labs, semester,
+                                                  job.priority_bonus,
+                                                  job.solver,
+                                                  job.set_progress,
+                                                  time_budget,
+                                                  local_search_time,
+                                                  warm_start=job.warm_start,
+                                                  decompose=job.decompose,
+                                                  allow_uncovered=(
+                                                      job.allow_uncovered))
+    except Exception as error:
+        # keep the worker alive, the dashboard shows the error instead
+        job.status = ScheduleJob.FAILED
+        job.message = str(error)
+    else:
+        job.status = ScheduleJob.DONE
+        job.phase = 'Done'
+        job.percent = 100
+        job.template_schedule = template_schedule
+
+        lo_cache = LOCache.objects.all().first()
+        if lo_cache is not None:
+            lo_cache.set_semester(semester)
+            lo_cache.set_template_schedule(template_schedule)
+
+    job.finished = timezone.now()
+    job.save()
+
+
+def open_templates():
+    """Return the most recent template schedule of every semester."""
+    latest = TemplateSchedule.objects.filter(
+        semester=OuterRef('semester')).order_by('-version_number')
+    return TemplateSchedule.objects.filter(
+        semester__isnull=False, pk=Subquery(latest.values('pk')[:1]))
+
+
+def rescore_tas(ta_ids):
+    """
+    Recalculate the scores of the given TA's in every open template.
+
+    Only templates the TA's were scored in are touched, each TA's row is
+    rescored with the priority bonus the template was generated with. The
+    TA's of a template are rescored together from one snapshot.
+    """
+    templates = {template.pk: template for template in open_templates()}
+    by_template = {}
+    for pk in templates:
+        # the scores may be shared with the template's parent
+        matrix = score_matrix_for(pk)
+        if matrix is None:
+            continue
+        tas = [ta_id for ta_id in ta_ids if matrix.has_ta(ta_id)]
+        if tas:
+            by_template[pk] = tas
+
+    for pk, tas in by_template.items():
+        template = templates[pk]
+        snapshot = build_snapshot(
+            tas, Lab.objects.filter(semester=template.semester_id))
+        lab_scores = build_score_matrix(snapshot.tas, snapshot.labs,
+                                        template.priority_bonus, workers=1,
+                                        class_times=snapshot.class_times())
+        save_scores(snapshot.tas, snapshot.labs, lab_scores, template.pk)
+
 
 def propogate_schedule(template_schedule, all_tas):
     """Propogate the TemplateSchedule object to the live schedule."""
@@ -0,0 +1,69 @@
+"""
+Scoring work that can be spread over worker processes.
+
+Nothing here touches the database, workers are only sent NumPy arrays.
+"""
+from concurrent.futures import ProcessPoolExecutor
+import numpy as np
+
+
+def count_conflicts(n_rows, owners, time_masks, time_inverse,
+                    lab_masks, lab_inverse):
+    """
+    Count the class times of each row that overlap each lab.
+
+    n_rows = number of rows (TA's) to count for
+    owners = row of every class time
+    time_masks, lab_masks = distinct weekly masks as rows of 32 bit words
+    time_inverse, lab_inverse = index of the mask of every class time / lab
+
+    Return an integer array of shape (n_rows, len(lab_inverse)).
+    """
+    conflicts = np.zeros((n_rows, len(lab_inverse)), dtype=np.int64)
+    overlap = mask_overlap(time_masks, lab_masks)
+    overlap = overlap[np.ix_(time_inverse, lab_inverse)]
+    np.add.at(conflicts, owners, overlap.astype(np.int64))
+    return conflicts
+
+
+def sharded_conflicts(n_rows, owners, time_masks, time_inverse,
+                      lab_masks, lab_inverse, workers=1):
+    """
+    Run count_conflicts with its rows split over worker processes.
+
+    The rows are cut into one block per worker and the results are stacked
+    back in order, so the counts are exactly those of a single call.
+    """
+    workers = min(workers, n_rows)
+    if workers <= 1:
+        return count_conflicts(n_rows, owners, time_masks, time_inverse,
+                               lab_masks, lab_inverse)
+
+    jobs = []
+    bounds = np.linspace(0, n_rows, workers + 1).astype(np.int64)
+    for start, stop in zip(bounds[:-1], bounds[1:]):
+        chosen = (owners >= start) & (owners < stop)
+        # only send the masks the class times of this block use
+        used, block_inverse = np.unique(time_inverse[chosen],
+                                        return_inverse=True)
+        jobs.append((int(stop - start), owners[chosen] - start,
+                     time_masks[used], block_inverse.reshape(-1),
+                     lab_masks, lab_inverse))
+
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        blocks = list(executor.map(_count_job, jobs))
+    return np.vstack(blocks)
+
+
+def _count_job(job):
+    """Run a single block of sharded_conflicts."""
+    return count_conflicts(*job)
+
+
+def mask_overlap(first, second, chunk=128):
+    """Return which of the first masks share a bit with the second masks."""
+    overlap = np.zeros((len(first), len(second)), dtype=bool)
+    for start in range(0, len(first), chunk):
+        block = first[start:start + chunk, None, :] & second[None, :, :]
+        overlap[start:start + chunk] = block.any(axis=2)
+    return overlap
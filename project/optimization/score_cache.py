@@ -0,0 +1,98 @@
+"""
+Score matrices cached as memory-mapped files, shared by worker processes.
+
+Each file holds one version of a template's ScoreMatrix and is named after
+the template, the version and a digest of the scores, so a file never goes
+stale: rewritten scores get a new name. Workers map the files read only and
+share their pages through the OS page cache. The cache lives in
+settings.SCORE_CACHE_DIR, an empty setting turns it off.
+
+Every file is two int64 counts (TA's, labs), the TA primary keys, the lab
+primary keys and the int16 scores, all little endian.
+"""
+import glob
+import os
+import tempfile
+import numpy as np
+from django.conf import settings
+
+
+ID_DTYPE = np.dtype('<i8')
+SCORE_DTYPE = np.dtype('<i2')
+
+
+def cache_path(template_id, version, digest):
+    """Return the path of the cache file of a score matrix version."""
+    return os.path.join(settings.SCORE_CACHE_DIR,
+                        f'template_{template_id}_v{version}_{digest}.scores')
+
+
+def read(template_id, version, digest):
+    """
+    Map the cached score matrix of a template version, if there is one.
+
+    Return read only (TA ids, lab ids, scores) arrays, or None if the file
+    is missing or does not hold a whole matrix.
+    """
+    if not settings.SCORE_CACHE_DIR:
+        return None
+    path = cache_path(template_id, version, digest)
+    try:
+        counts = np.fromfile(path, dtype=ID_DTYPE, count=2)
+        if len(counts) < 2:
+            return None
+        n_tas, n_labs = (int(count) for count in counts)
+        ids_size = (n_tas + n_labs) * ID_DTYPE.itemsize
+        scores_size = n_tas * n_labs * SCORE_DTYPE.itemsize
+        if (not scores_size
+                or os.path.getsize(path) != 16 + ids_size + scores_size):
+            return None
+        ids = np.memmap(path, dtype=ID_DTYPE, mode='r', offset=16,
+                        shape=(n_tas + n_labs,))
+        scores = np.memmap(path, dtype=SCORE_DTYPE, mode='r',
+                           offset=16 + ids_size, shape=(n_tas, n_labs))
+    except (OSError, ValueError):
+        return None
+    return ids[:n_tas], ids[n_tas:], scores
+
+
+def write(template_id, version, digest, ta_ids, lab_ids, scores):
+    """
+    Cache a template's score matrix version.
+
+    The file is written under a temporary name and moved in place, so other
+    workers never map a half written file. Caching is best effort, nothing
+    is raised if the file cannot be written.
+    """
+    if not settings.SCORE_CACHE_DIR or not np.size(scores):
+        return
+    header = np.array([len(ta_ids), len(lab_ids)], dtype=ID_DTYPE)
+    try:
+        os.makedirs(settings.SCORE_CACHE_DIR, exist_ok=True)
+        with tempfile.NamedTemporaryFile(dir=settings.SCORE_CACHE_DIR,
+                                         suffix='.tmp', delete=False) as file:
+            file.write(header.tobytes())
+            file.write(np.asarray(ta_ids, dtype=ID_DTYPE).tobytes())
+            file.write(np.asarray(lab_ids, dtype=ID_DTYPE).tobytes())
+            file.write(np.asarray(scores, dtype=SCORE_DTYPE).tobytes())
+        os.replace(file.name, cache_path(template_id, version, digest))
+    except OSError:
+        return
+
+
+def remove(template_id):
+    """
+    Delete every cached version of a template's score matrix.
+
+    Workers that still have a removed file mapped keep reading it until
+    they load the new version.
+    """
+    if not settings.SCORE_CACHE_DIR:
+        return
+    pattern = os.path.join(settings.SCORE_CACHE_DIR,
+                           f'template_{template_id}_v*.scores')
+    for path in glob.glob(pattern):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,89 @@
+"""Keep stored and cached scores up to date."""
+import threading
+from django.core.signals import request_started
+from django.db import transaction
+from django.db.models.signals import pre_save, post_save, post_delete
+from django.dispatch import receiver
+from teachingassistant.models import TA, ClassTime
+from . import score_cache
+from .models import (ScoreMatrix, clear_score_matrices,
+                     clear_flattened_assignments)
+from .optimization_utils import rescore_tas
+
+
+# TA's waiting to be rescored once the current transaction commits
+_pending = threading.local()
+
+
+def queue_rescore(ta_id):
+    """
+    Rescore a TA in the open templates once the transaction commits.
+
+    Any number of changes to a TA within one transaction rescore it once.
+    """
+    _pending_tas().add(ta_id)
+    transaction.on_commit(_rescore_pending)
+
+
+def _pending_tas():
+    """Return the set of TA's waiting to be rescored in this thread."""
+    if not hasattr(_pending, 'tas'):
+        _pending.tas = set()
+    return _pending.tas
+
+
+def _rescore_pending():
+    """Rescore every waiting TA, later calls find nothing left to do."""
+    pending = _pending_tas()
+    if not pending:
+        return
+    ta_ids = list(pending)
+    pending.clear()
+    rescore_tas(ta_ids)
+
+
+@receiver(pre_save, sender=TA)
+def note_experience_change(sender, instance, **kwargs):
+    """Check if a TA's experience is about to change."""
+    instance._experience_changed = False
+    # fixtures are rescored by loaddata once they are all loaded
+    if kwargs.get('raw'):
+        return
+    if instance.pk is not None:
+        old = TA.objects.filter(pk=instance.pk).values_list('experience',
+                                                            flat=True)
+        instance._experience_changed = (old.exists()
+                                        and old[0] != instance.experience)
+
+
+@receiver(post_save, sender=TA)
+def rescore_experience(sender, instance, **kwargs):
+    """Rescore a TA whose experience changed."""
+    if kwargs.get('raw'):
+        return
+    if getattr(instance, '_experience_changed', False):
+        queue_rescore(instance.pk)
+
+
+@receiver(post_save, sender=ClassTime)
+@receiver(post_delete, sender=ClassTime)
+def rescore_class_times(sender, instance, **kwargs):
+    """Rescore the TA of a class time that was saved or deleted."""
+    if kwargs.get('raw'):
+        return
+    if instance.ta_id is not None:
+        queue_rescore(instance.ta_id)
+
+
+@receiver(post_delete, sender=ScoreMatrix)
+def remove_cached_scores(sender, instance, **kwargs):
+    """Delete the cached files of a template's scores with them."""
+    score_cache.remove(instance.template_id)
+
+
+# every request reads the score matrices and assignments as they are when
+# it starts
+request_started.connect(clear_score_matrices,
+                        dispatch_uid='clear_score_matrices')
+request_started.connect(clear_flattened_assignments,
+                        dispatch_uid='clear_flattened_assignments')
@@ -0,0 +1,131 @@
+"""
+Plain snapshots of the TA's and labs a schedule is generated for.
+
+A snapshot is loaded in a fixed number of queries, one each for the TA's,
+the labs and the class times, no matter how many there are. Its rows carry
+the fields the scoring and solving code reads from TA and Lab objects, so
+no query is made once generation starts.
+"""
+import numpy as np
+from django.db.models.query import QuerySet
+from laborganizer.models import Lab
+from laborganizer.time_slots import EMPTY_MASK
+from teachingassistant.models import TA, ClassTime
+
+
+class TARow:
+    """The fields of a TA used to generate a schedule."""
+
+    __slots__ = ('index', 'pk', 'student_id', 'first_name', 'last_name',
+                 'contracted', 'max_labs', 'availability_key', 'experience',
+                 'courses', 'class_times')
+
+    def __init__(self, index, pk, student_id, first_name, last_name,
+                 contracted, max_labs, availability_key, experience):
+        self.index = index
+        self.pk = pk
+        self.student_id = student_id
+        self.first_name = first_name
+        self.last_name = last_name
+        self.contracted = contracted
+        self.max_labs = max_labs
+        self.availability_key = availability_key
+        self.experience = experience
+        self.courses = TA.get_experience(self)
+        self.class_times = []
+
+    def __str__(self):
+        """Define human readable object name, the same as a TA's."""
+        return self.first_name + ' ' + self.last_name
+
+    def get_experience(self):
+        """Return the (subject, catalog ID) tuples of the TA's experience."""
+        return self.courses
+
+
+class LabRow:
+    """The fields of a lab used to generate a schedule."""
+
+    __slots__ = ('index', 'pk', 'course_id', 'class_name', 'subject',
+                 'catalog_id', 'semester_id', 'time_slots')
+
+    def __init__(self, index, pk, course_id, class_name, subject, catalog_id,
+                 semester_id, time_slots):
+        self.index = index
+        self.pk = pk
+        self.course_id = course_id
+        self.class_name = class_name
+        self.subject = subject
+        self.catalog_id = catalog_id
+        self.semester_id = semester_id
+        self.time_slots = bytes(time_slots or EMPTY_MASK)
+
+    def __str__(self):
+        """Define human readable object name, the same as a lab's."""
+        return self.subject + self.catalog_id + ' : ' + self.class_name
+
+
+class Snapshot:
+    """
+    The TA's and labs of a schedule, with dense indices.
+
+    tas, labs = lists of TARow and LabRow, each row's index is its position
+    contracted, capacity = arrays over the TA's, see solvers.Problem
+    """
+
+    __slots__ = ('tas', 'labs', 'contracted', 'capacity')
+
+    def __init__(self, tas, labs):
+        self.tas = tas
+        self.labs = labs
+        self.contracted = np.array([bool(ta.contracted) for ta in tas],
+                                   dtype=bool)
+        self.capacity = np.array([ta.max_labs for ta in tas], dtype=np.int64)
+
+    def class_times(self):
+        """Return the class time masks of every TA, see class_time_masks."""
+        return [ta.class_times for ta in self.tas]
+
+
+def build_snapshot(tas, labs):
+    """
+    Load a snapshot of the given TA's and labs in three queries.
+
+    tas = TA objects or primary keys, in the order the TA's are considered
+    labs = QuerySet of labs, or lab objects or primary keys, in order
+
+    TA's or labs that no longer exist are left out.
+    """
+    ta_pks = [getattr(ta, 'pk', ta) for ta in tas]
+    found = {}
+    for row in TA.objects.filter(pk__in=ta_pks).values_list(
+            'pk', 'student_id', 'first_name', 'last_name', 'contracted',
+            'max_labs', 'availability_key', 'experience'):
+        found[row[0]] = row
+    ta_rows = [TARow(index, *found[pk])
+               for index, pk in enumerate(pk for pk in ta_pks if pk in found)]
+
+    fields = ('pk', 'course_id', 'class_name', 'subject', 'catalog_id',
+              'semester_id', 'time_slots')
+    if isinstance(labs, QuerySet):
+        lab_values = list(labs.values_list(*fields))
+    else:
+        lab_pks = [getattr(lab, 'pk', lab) for lab in labs]
+        found = {row[0]: row for row in
+                 Lab.objects.filter(pk__in=lab_pks).values_list(*fields)}
+        lab_values = [found[pk] for pk in lab_pks if pk in found]
+    lab_rows = [LabRow(index, *row) for index, row in enumerate(lab_values)]
+
+    # class times hang off each TA's availability
+    by_availability = {}
+    for ta in ta_rows:
+        if ta.availability_key is not None:
+            by_availability.setdefault(ta.availability_key, []).append(ta)
+    class_times = ClassTime.objects.filter(
+        availability__pk__in=list(by_availability)).values_list(
+            'availability__pk', 'time_slots')
+    for availability_key, time_slots in class_times:
+        for ta in by_availability[availability_key]:
+            ta.class_times.append(bytes(time_slots or EMPTY_MASK))
+
+    return Snapshot(ta_rows, lab_rows)
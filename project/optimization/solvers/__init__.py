@@ -0,0 +1,21 @@
+"""
+Assignment solvers for template schedules.
+
+Solvers work on plain NumPy arrays and never touch the database. They take a
+(TA, lab) score matrix and return an assignment array with one entry per lab
+holding the index of the assigned TA, or -1 if the lab is left unassigned.
+
+Solvers are offered to the rest of the project as named engines, see
+registry.py. Every engine takes a Problem and returns the assignment array
+and whether it is proven optimal. New engines are registered in engines.py.
+"""
+from .greedy import greedy
+from .hungarian import (hungarian, max_weight_matching, priority_weights)
+from .flow import min_cost_flow
+from .anytime import anytime
+from .local_search import local_search
+from .components import components, solve_components
+from .matching import max_matching, hall_violator
+from .registry import (Problem, Engine, register, get_engine,
+                       engine_choices)
+from . import engines
@@ -0,0 +1,199 @@
+"""Time boxed assignment of TA's to labs, improving a greedy start."""
+import time
+import numpy as np
+from .greedy import greedy
+from .hungarian import priority_weights
+
+
+def anytime(scores, contracted, capacity, time_budget=None):
+    """
+    Improve a greedy assignment until it is optimal or time runs out.
+
+    scores = (TA, lab) score matrix
+    contracted = boolean array, True for contracted TA's
+    capacity = most labs each TA can be assigned to
+    time_budget = seconds to spend improving, None to run until optimal
+
+    The assignment is improved by moving labs between TA's along negative
+    cycles of the residual network used by min_cost_flow, so it always
+    stays a valid assignment and gets better with every move. Leaving a lab
+    unassigned is modeled as a TA with room for every lab at a cost higher
+    than any set of assignments, so covering more labs comes first, then
+    contracted TA's, then the total score.
+
+    Return (assignment, is_optimal), is_optimal being True once no move
+    can improve the assignment any more.
+    """
+    started = time.monotonic()
+    scores = np.asarray(scores)
+    contracted = np.asarray(contracted, dtype=bool)
+    capacity = np.asarray(capacity, dtype=np.int64)
+    n_tas, n_labs = scores.shape
+
+    assignment = greedy(scores, contracted, capacity)
+    if n_tas == 0 or n_labs == 0:
+        return assignment, True
+
+    weights = priority_weights(scores, contracted, n_labs)
+    weights = weights.astype(np.float64)
+    cost = weights.max() - weights
+
+    # the last row stands for leaving a lab unassigned
+    unassigned_cost = cost.max() * n_labs + 1
+    cost = np.vstack([cost, np.full(n_labs, unassigned_cost)])
+    capacity = np.append(capacity, n_labs)
+    owner = np.where(assignment < 0, n_tas, assignment)
+
+    deadline = None
+    if time_budget is not None:
+        deadline = started + time_budget
+
+    while True:
+        moves = _negative_cycle(cost, owner, capacity, deadline)
+        if moves is None:
+            is_optimal = False
+            break
+        if not moves:
+            is_optimal = True
+            break
+        for lab, ta in moves:
+            owner[lab] = ta
+
+    return np.where(owner == n_tas, -1, owner), is_optimal
+
+
+def _negative_cycle(cost, owner, capacity, deadline):
+    """
+    Find a negative cycle in the residual network with Bellman-Ford.
+
+    Nodes are the TA's (the last one being "unassigned"), the labs and a
+    source. Edges go from a TA to every lab it does not hold, from a lab
+    back to its TA, from the source to every TA with room for another lab
+    and from every TA holding a lab back to the source.
+
+    Return the cycle as a list of (lab, new TA) moves, an empty list if
+    there is no negative cycle, or None if the deadline passed first.
+    """
+    n_tas, n_labs = cost.shape
+    labs = np.arange(n_labs)
+    source = n_tas + n_labs
+    load = np.bincount(owner, minlength=n_tas)
+    has_room = load < capacity
+    has_labs = load > 0
+    held_cost = cost[owner, labs]
+
+    # every node starts at distance 0, as if reached from a virtual node
+    ta_distance = np.zeros(n_tas)
+    lab_distance = np.zeros(n_labs)
+    source_distance = 0.0
+    # parents use one numbering: TA's, then labs, then the source
+    parent = np.full(n_tas + n_labs + 1, -1, dtype=np.int64)
+
+    for _ in range(2 * (n_tas + n_labs + 1)):
+        if deadline is not None and time.monotonic() >= deadline:
+            return None
+
+        # TA -> lab, for every TA but the lab's own
+        through = ta_distance[:, None] + cost
+        through[owner, labs] = np.inf
+        best_ta = np.argmin(through, axis=0)
+        lab_candidate = through[best_ta, labs]
+
+        # lab -> its TA, taking the lab back
+        back = lab_distance - held_cost
+        order = np.lexsort((back, owner))
+        first = np.ones(n_labs, dtype=bool)
+        first[1:] = owner[order][1:] != owner[order][:-1]
+        best_lab = np.full(n_tas, -1, dtype=np.int64)
+        best_lab[owner[order][first]] = order[first]
+        ta_candidate = np.full(n_tas, np.inf)
+        ta_candidate[owner[order][first]] = back[order][first]
+        ta_parent = n_tas + best_lab
+
+        # source -> TA with room for another lab
+        from_source = has_room & (source_distance < ta_candidate)
+        ta_candidate[from_source] = source_distance
+        ta_parent[from_source] = source
+
+        # TA holding a lab -> source
+        source_candidate = np.inf
+        source_parent = -1
+        if has_labs.any():
+            holders = np.flatnonzero(has_labs)
+            nearest = holders[np.argmin(ta_distance[holders])]
+            source_candidate = ta_distance[nearest]
+            source_parent = nearest
+
+        better_labs = lab_candidate < lab_distance
+        better_tas = ta_candidate < ta_distance
+        better_source = source_candidate < source_distance
+        if not (better_labs.any() or better_tas.any() or better_source):
+            return []
+
+        lab_distance[better_labs] = lab_candidate[better_labs]
+        parent[n_tas + labs[better_labs]] = best_ta[better_labs]
+        ta_distance[better_tas] = ta_candidate[better_tas]
+        parent[np.flatnonzero(better_tas)] = ta_parent[better_tas]
+        if better_source:
+            source_distance = source_candidate
+            parent[source] = source_parent
+
+        cycle = _parent_cycle(parent)
+        if cycle is not None:
+            moves = _cycle_moves(cycle, cost, owner, n_tas)
+            if moves is not None:
+                return moves
+
+    # distances kept falling without a cycle showing up, which cannot
+    # happen without a negative cycle, so give up on improving instead
+    return None
+
+
+def _parent_cycle(parent):
+    """Return the nodes of a cycle of parent links, in edge order, or None."""
+    state = np.zeros(len(parent), dtype=np.int8)
+    for start in np.flatnonzero(parent >= 0):
+        if state[start]:
+            continue
+        path = []
+        node = start
+        while node >= 0 and not state[node]:
+            state[node] = 1
+            path.append(node)
+            node = parent[node]
+        if node >= 0 and state[node] == 1 and node in path:
+            # follow the links back from the node that closed the loop,
+            # then reverse them so each node leads to the next
+            cycle = path[path.index(node):]
+            for visited in path:
+                state[visited] = 2
+            return cycle[::-1]
+        for visited in path:
+            state[visited] = 2
+    return None
+
+
+def _cycle_moves(cycle, cost, owner, n_tas):
+    """
+    Turn a cycle of the residual network into lab moves.
+
+    Return the list of (lab, new TA) moves, or None if the cycle does not
+    lower the cost.
+    """
+    n_labs = len(owner)
+    moves = []
+    change = 0.0
+    for index, node in enumerate(cycle):
+        following = cycle[(index + 1) % len(cycle)]
+        if node < n_tas and n_tas <= following < n_tas + n_labs:
+            # the TA takes the lab
+            lab = following - n_tas
+            moves.append((lab, node))
+            change += cost[node, lab]
+        elif n_tas <= node < n_tas + n_labs and following < n_tas:
+            # the lab leaves its TA
+            lab = node - n_tas
+            change -= cost[owner[lab], lab]
+    if change < 0 and moves:
+        return moves
+    return None
@@ -0,0 +1,87 @@
+"""Splitting an assignment problem into independent parts."""
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+import numpy as np
+
+
+def components(feasible):
+    """
+    Split the bipartite TA/lab feasibility graph into connected components.
+
+    feasible = boolean (TA, lab) matrix, True where the TA can take the lab
+
+    Return a list of (TA indices, lab indices) arrays, one per component
+    with at least one feasible pair, largest first. TA's and labs with no
+    feasible pair are left out.
+    """
+    feasible = np.asarray(feasible, dtype=bool)
+    n_tas, n_labs = feasible.shape
+    ta_used = feasible.any(axis=1)
+    lab_used = feasible.any(axis=0)
+
+    # every node takes the smallest label it is connected to, until no
+    # label changes
+    ta_label = np.arange(n_tas)
+    lab_label = np.full(n_labs, n_tas)
+    while True:
+        lab_new = np.where(feasible, ta_label[:, None], n_tas).min(axis=0)
+        lab_new = np.minimum(lab_new, lab_label)
+        ta_new = np.where(feasible, lab_new[None, :], n_tas).min(axis=1)
+        ta_new = np.minimum(ta_new, ta_label)
+        if (ta_new == ta_label).all() and (lab_new == lab_label).all():
+            break
+        ta_label, lab_label = ta_new, lab_new
+
+    parts = []
+    for label in np.unique(ta_label[ta_used]):
+        parts.append((np.flatnonzero(ta_used & (ta_label == label)),
+                      np.flatnonzero(lab_used & (lab_label == label))))
+    parts.sort(key=lambda part: -len(part[0]) * len(part[1]))
+    return parts
+
+
+def solve_components(engine, problem, feasible, workers=1, time_budget=None):
+    """
+    Run an engine on each connected component of the feasibility graph.
+
+    No TA can take labs of two components, so the components are solved
+    on their own and their assignments put together. Labs without any
+    feasible TA are left unassigned.
+
+    engine = engine to run, see registry.get_engine
+    problem = the Problem to solve
+    feasible = boolean (TA, lab) matrix, True where the TA can take the lab
+    workers = number of processes the components are spread over
+    time_budget = seconds for engines taking a time budget, shared between
+                  the components by their number of labs
+
+    Return the assignment and whether every component is proven optimal.
+    """
+    assignment = np.full(problem.shape[1], -1, dtype=np.int64)
+    parts = components(feasible)
+
+    jobs = []
+    total_labs = sum(len(labs) for tas, labs in parts)
+    for tas, labs in parts:
+        budget = None
+        if time_budget is not None:
+            budget = time_budget * len(labs) / total_labs
+        jobs.append(partial(engine, problem.subset(tas, labs), budget))
+
+    workers = min(workers, len(jobs))
+    if workers <= 1:
+        results = [job() for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_run_job, jobs))
+
+    is_optimal = True
+    for (tas, labs), (result, optimal) in zip(parts, results):
+        is_optimal = is_optimal and optimal
+        assignment[labs] = np.where(result >= 0, tas[result], -1)
+    return assignment, is_optimal
+
+
+def _run_job(job):
+    """Run a single component of solve_components."""
+    return job()
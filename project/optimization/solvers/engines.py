@@ -0,0 +1,42 @@
+"""The engines available to generate template schedules."""
+from .registry import register
+from .greedy import greedy
+from .hungarian import hungarian
+from .flow import min_cost_flow
+from .anytime import anytime
+from .local_search import local_search
+
+
+@register('greedy', 'Greedy (original)')
+def greedy_engine(problem, time_budget=None):
+    """Run the original greedy assignment."""
+    return greedy(problem.scores, problem.contracted,
+                  problem.capacity), False
+
+
+@register('hungarian', 'Hungarian (one lab per TA at a time)')
+def hungarian_engine(problem, time_budget=None):
+    """Run rounds of optimal one lab per TA matchings."""
+    return hungarian(problem.scores, problem.contracted,
+                     problem.capacity), False
+
+
+@register('flow', 'Min-cost flow (optimal)')
+def flow_engine(problem, time_budget=None):
+    """Find an optimal assignment over every TA's labs."""
+    return min_cost_flow(problem.scores, problem.contracted,
+                         problem.capacity), True
+
+
+@register('anytime', 'Anytime (improves greedy until out of time)')
+def anytime_engine(problem, time_budget=None):
+    """Improve a greedy assignment until optimal or out of time."""
+    return anytime(problem.scores, problem.contracted, problem.capacity,
+                   time_budget)
+
+
+@register('local_search', 'Greedy with swaps')
+def local_search_engine(problem, time_budget=None):
+    """Swap the TA's of a greedy assignment until no swap improves it."""
+    assignment = greedy(problem.scores, problem.contracted, problem.capacity)
+    return local_search(problem.scores, assignment, time_budget), False
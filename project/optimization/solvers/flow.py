@@ -0,0 +1,224 @@
+"""Optimal multi-lab assignment of TA's to labs (min-cost flow)."""
+import numpy as np
+from .hungarian import priority_weights
+
+
+def min_cost_flow(scores, contracted, capacity):
+    """
+    Assign TA's to labs, up to their capacity, in one optimal solve.
+
+    scores = (TA, lab) score matrix
+    contracted = boolean array, True for contracted TA's
+    capacity = most labs each TA can be assigned to
+
+    The network is source -> TA (capacity = the TA's most labs) -> lab
+    (capacity 1) -> sink, with the cost of a TA -> lab edge being how far its
+    weight is below the best weight. Successive shortest paths push as much
+    flow as possible, so as many labs as possible are covered, at the lowest
+    total cost. Like the Hungarian solver, contracted TA's come first.
+
+    TA's with the same scores and contract status are interchangeable, so
+    they are solved as a single TA holding all of their capacity and their
+    labs are then dealt out to them in turn.
+    """
+    scores = np.asarray(scores)
+    contracted = np.asarray(contracted, dtype=bool)
+    capacity = np.asarray(capacity, dtype=np.int64)
+    n_tas, n_labs = scores.shape
+    if n_tas == 0 or n_labs == 0:
+        return np.full(n_labs, -1, dtype=np.int64)
+
+    first_tas, groups = equivalent_tas(scores, contracted)
+    group_capacity = np.bincount(groups, weights=capacity,
+                                 minlength=len(first_tas)).astype(np.int64)
+    group_assignment = _flow_assignment(scores[first_tas],
+                                        contracted[first_tas], group_capacity)
+    return _deal_out(group_assignment, groups, capacity)
+
+
+def equivalent_tas(scores, contracted):
+    """
+    Group TA's with the same scores and contract status.
+
+    Return the index of the first TA of every group and the index of each
+    TA's group, with the groups in the order of their first TA.
+    """
+    rows = np.column_stack([scores, contracted])
+    _, first_tas, groups = np.unique(rows, axis=0, return_index=True,
+                                     return_inverse=True)
+    order = np.argsort(first_tas)
+    rank = np.empty_like(order)
+    rank[order] = np.arange(len(order))
+    return first_tas[order], rank[groups.reshape(-1)]
+
+
+def _deal_out(group_assignment, groups, capacity):
+    """Hand the labs of every group to its TA's in turn, within capacity."""
+    members = [[] for _ in range(groups.max() + 1)]
+    for ta, group in enumerate(groups):
+        members[group].append(ta)
+
+    assignment = np.full(len(group_assignment), -1, dtype=np.int64)
+    load = np.zeros(len(groups), dtype=np.int64)
+    turn = np.zeros(len(members), dtype=np.int64)
+    for lab, group in enumerate(group_assignment):
+        if group < 0:
+            continue
+        # the group has room for every one of its labs, so a TA of the
+        # group with room left is always found
+        while True:
+            ta = members[group][turn[group] % len(members[group])]
+            turn[group] += 1
+            if load[ta] < capacity[ta]:
+                break
+        assignment[lab] = ta
+        load[ta] += 1
+    return assignment
+
+
+def _flow_assignment(scores, contracted, capacity):
+    """Solve the flow network, see min_cost_flow."""
+    n_tas, n_labs = scores.shape
+    assignment = np.full(n_labs, -1, dtype=np.int64)
+
+    # every lab holds at most one TA, so no matching has more pairs than labs
+    weights = priority_weights(scores, contracted, n_labs)
+    weights = weights.astype(np.float64)
+    cost = weights.max() - weights
+    load = np.zeros(n_tas, dtype=np.int64)
+
+    # node potentials keep every residual edge cost non-negative
+    ta_potential = np.zeros(n_tas)
+    lab_potential = cost.min(axis=0)
+    sink_potential = _initial_flow(cost, capacity, assignment, load,
+                                   lab_potential)
+
+    while (load < capacity).any() and (assignment < 0).any():
+        path = _shortest_path(cost, assignment, load, capacity,
+                              ta_potential, lab_potential, sink_potential)
+        if path is None:
+            break
+        ta_distance, lab_distance, sink_distance, lab_parent, ta_parent, \
+            last_lab = path
+
+        # move the flow along the path, back from the sink to the source
+        lab = last_lab
+        while True:
+            ta = lab_parent[lab]
+            previous_lab = ta_parent[ta]
+            assignment[lab] = ta
+            if previous_lab < 0:
+                load[ta] += 1
+                break
+            lab = previous_lab
+
+        ta_potential += ta_distance
+        lab_potential += lab_distance
+        sink_potential += sink_distance
+
+    return assignment
+
+
+def _initial_flow(cost, capacity, assignment, load, lab_potential):
+    """
+    Give labs to their cheapest TA's while that keeps the flow optimal.
+
+    Labs are taken from the cheapest up, each going to the first TA with the
+    lowest cost for it and room for another lab. Once a lab cannot be placed,
+    only labs just as cheap are still placed, and the sink potential is set
+    between the placed labs and the rest. Return the sink potential.
+    """
+    sink_potential = None
+    for lab in np.argsort(lab_potential, kind='stable'):
+        if (sink_potential is not None
+                and lab_potential[lab] > sink_potential):
+            break
+        tas = np.flatnonzero((cost[:, lab] == lab_potential[lab])
+                             & (load < capacity))
+        if len(tas) != 0:
+            assignment[lab] = tas[0]
+            load[tas[0]] += 1
+        elif sink_potential is None:
+            sink_potential = lab_potential[lab]
+
+    if sink_potential is None:
+        sink_potential = lab_potential.max()
+    return float(sink_potential)
+
+
+def _shortest_path(cost, assignment, load, capacity,
+                   ta_potential, lab_potential, sink_potential):
+    """
+    Run Dijkstra from the source to the sink over the residual network.
+
+    Nodes that are not settled before the sink get the sink's distance, which
+    keeps the reduced costs non-negative once the potentials are updated.
+    Return None when the sink cannot be reached.
+    """
+    n_tas, n_labs = cost.shape
+    ta_distance = np.full(n_tas, np.inf)
+    lab_distance = np.full(n_labs, np.inf)
+    ta_parent = np.full(n_tas, -1, dtype=np.int64)
+    lab_parent = np.full(n_labs, -1, dtype=np.int64)
+    # distances of the nodes not settled yet, settled nodes are at infinity
+    ta_open = np.full(n_tas, np.inf)
+    lab_open = np.full(n_labs, np.inf)
+    ta_done = np.zeros(n_tas, dtype=bool)
+    lab_done = np.zeros(n_labs, dtype=bool)
+    free_labs = assignment < 0
+    # lab -> sink edges exist for every lab nobody holds yet
+    sink_cost = np.where(free_labs, lab_potential - sink_potential, np.inf)
+    sink_distance = np.inf
+    last_lab = -1
+
+    # source -> TA edges exist while a TA has room for another lab
+    spare = load < capacity
+    ta_distance[spare] = -ta_potential[spare]
+    ta_open[spare] = ta_distance[spare]
+
+    while True:
+        ta = int(np.argmin(ta_open))
+        lab = int(np.argmin(lab_open))
+        nearest = min(ta_open[ta], lab_open[lab])
+        if nearest == np.inf or sink_distance <= nearest:
+            break
+
+        if ta_open[ta] <= lab_open[lab]:
+            # TA -> lab edges for every lab this TA does not hold
+            ta_done[ta] = True
+            ta_open[ta] = np.inf
+            candidate = (ta_distance[ta] + cost[ta] + ta_potential[ta]
+                         - lab_potential)
+            better = ((candidate < lab_distance) & ~lab_done
+                      & (assignment != ta))
+            lab_distance[better] = candidate[better]
+            lab_open[better] = candidate[better]
+            lab_parent[better] = ta
+
+            # the sink can be relaxed right away through free labs
+            through = lab_distance + sink_cost
+            closest = int(np.argmin(through))
+            if through[closest] < sink_distance:
+                sink_distance = through[closest]
+                last_lab = closest
+        else:
+            # lab -> TA edge, giving the lab back to its current TA
+            lab_done[lab] = True
+            lab_open[lab] = np.inf
+            owner = assignment[lab]
+            if owner >= 0 and not ta_done[owner]:
+                candidate = (lab_distance[lab] - cost[owner, lab]
+                             + lab_potential[lab] - ta_potential[owner])
+                if candidate < ta_distance[owner]:
+                    ta_distance[owner] = candidate
+                    ta_open[owner] = candidate
+                    ta_parent[owner] = lab
+
+    if sink_distance == np.inf:
+        return None
+
+    # settled nodes keep their distance, the rest get the sink's distance
+    ta_distance = np.where(ta_done, ta_distance, sink_distance)
+    lab_distance = np.where(lab_done, lab_distance, sink_distance)
+    return (ta_distance, lab_distance, sink_distance, lab_parent, ta_parent,
+            last_lab)
@@ -0,0 +1,73 @@
+"""Greedy assignment of TA's to labs, contracted TA's first."""
+import numpy as np
+
+
+# scores at or below this value are never considered the highest score
+LOWEST_SCORE = -99999
+
+
+def greedy(scores, contracted, capacity):
+    """
+    Assign TA's to labs by always picking the highest scoring TA.
+
+    scores = (TA, lab) score matrix
+    contracted = boolean array, True for contracted TA's
+    capacity = most labs each TA can be assigned to
+
+    Labs are visited in order. First every TA receives at most one lab,
+    contracted TA's before uncontracted ones, then any remaining labs are
+    given to the highest scoring TA's that are still below their capacity.
+    Ties go to the TA that comes first.
+    """
+    scores = np.asarray(scores)
+    contracted = np.asarray(contracted, dtype=bool)
+    capacity = np.asarray(capacity, dtype=np.int64)
+    assignment = np.full(scores.shape[1], -1, dtype=np.int64)
+    load = np.zeros(scores.shape[0], dtype=np.int64)
+    groups = [np.flatnonzero(contracted), np.flatnonzero(~contracted)]
+
+    # labs each TA takes in the first pass, none for TA's without room
+    first_pass = np.minimum(capacity, 1)
+
+    # give every TA a single lab, contracted TA's first
+    for group in groups:
+        if (assignment >= 0).all():
+            break
+        for lab in range(len(assignment)):
+            # stop once every TA in the group with room has a lab
+            if (load[group] >= first_pass[group]).all():
+                break
+            if assignment[lab] >= 0:
+                continue
+            candidates = highest_scoring(scores, group, lab)
+            candidates = candidates[load[candidates] < first_pass[candidates]]
+            # if every top TA already has a lab, leave this lab for later
+            if len(candidates) != 0:
+                assignment[lab] = candidates[0]
+                load[candidates[0]] += 1
+
+    # fill the remaining labs with TA's that have room for more
+    for group in groups:
+        for lab in range(len(assignment)):
+            if assignment[lab] >= 0:
+                continue
+            candidates = highest_scoring(scores, group, lab)
+            candidates = candidates[load[candidates] < capacity[candidates]]
+            if len(candidates) != 0:
+                assignment[lab] = candidates[0]
+                load[candidates[0]] += 1
+
+    return assignment
+
+
+def highest_scoring(scores, tas, lab):
+    """
+    Get the highest scoring TA's for a lab.
+
+    Return the indices from tas that share the highest score, in order.
+    """
+    if len(tas) == 0:
+        return tas
+    lab_scores = scores[tas, lab]
+    max_score = max(lab_scores.max(), LOWEST_SCORE)
+    return tas[lab_scores == max_score]
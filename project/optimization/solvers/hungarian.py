@@ -0,0 +1,144 @@
+"""Optimal one-to-one assignment of TA's to labs (Hungarian algorithm)."""
+import numpy as np
+
+
+def hungarian(scores, contracted, capacity):
+    """
+    Assign TA's to labs so the total score is as high as possible.
+
+    scores = (TA, lab) score matrix
+    contracted = boolean array, True for contracted TA's
+    capacity = most labs each TA can be assigned to
+
+    Every round is an optimal one-to-one matching between the labs that are
+    still unassigned and the TA's with room for another lab, so every TA gets
+    one lab before anyone gets a second. Contracted TA's come first: covering
+    one more lab with a contracted TA always beats any gain in score.
+    """
+    scores = np.asarray(scores)
+    contracted = np.asarray(contracted, dtype=bool)
+    capacity = np.asarray(capacity)
+    weights = priority_weights(scores, contracted)
+    assignment = np.full(scores.shape[1], -1, dtype=np.int64)
+    load = np.zeros(scores.shape[0], dtype=np.int64)
+
+    while True:
+        tas = np.flatnonzero(load < capacity)
+        labs = np.flatnonzero(assignment < 0)
+        if len(tas) == 0 or len(labs) == 0:
+            break
+        rows, columns = max_weight_matching(weights[np.ix_(tas, labs)])
+        assignment[labs[columns]] = tas[rows]
+        load[tas[rows]] += 1
+
+    return assignment
+
+
+def priority_weights(scores, contracted, most_pairs=None):
+    """
+    Add a contracted bonus to the scores large enough to act as a priority.
+
+    The bonus is bigger than any difference in total score two matchings can
+    have, so a matching using more contracted TA's always weighs more.
+    most_pairs = most (TA, lab) pairs a matching can hold, by default the
+                 smaller side of the scores
+    """
+    scores = np.asarray(scores, dtype=np.int64)
+    if scores.size == 0:
+        return scores
+    if most_pairs is None:
+        most_pairs = min(scores.shape)
+    spread = int(scores.max()) - int(scores.min())
+    bonus = spread * most_pairs + 1
+    return scores + bonus * np.asarray(contracted, dtype=np.int64)[:, None]
+
+
+def max_weight_matching(weights):
+    """
+    Find a maximum weight matching that covers the smaller side.
+
+    Return (rows, columns), arrays of matched row and column indices.
+    """
+    weights = np.asarray(weights, dtype=np.float64)
+    if weights.size == 0:
+        empty = np.zeros(0, dtype=np.int64)
+        return empty, empty
+
+    # the algorithm needs at most as many rows as columns
+    transposed = weights.shape[0] > weights.shape[1]
+    if transposed:
+        weights = weights.T
+
+    # minimize the cost of not picking the heaviest possible edge
+    matched = _min_cost_assignment(weights.max() - weights)
+    rows = np.arange(weights.shape[0])
+    if transposed:
+        return matched, rows
+    return rows, matched
+
+
+def _min_cost_assignment(cost):
+    """
+    Solve a rectangular assignment problem with rows <= columns.
+
+    Shortest augmenting path form of the Hungarian algorithm with row and
+    column potentials, O(rows^2 * columns). Every step of the inner search
+    is vectorized over the columns. Return the column matched to each row.
+    """
+    rows, columns = cost.shape
+    column_potential = np.zeros(columns + 1)
+    # owner[j] is the (1-based) row matched to column j, column 0 is virtual
+    owner = np.zeros(columns + 1, dtype=np.int64)
+    way = np.zeros(columns + 1, dtype=np.int64)
+
+    # start from the cheapest column of every row and match rows to those
+    # columns while they are free, scores usually tie so this covers most rows
+    row_potential = np.zeros(rows + 1)
+    row_potential[1:] = cost.min(axis=1)
+    unmatched = []
+    for row in range(1, rows + 1):
+        tight = np.flatnonzero((cost[row - 1] == row_potential[row])
+                               & (owner[1:] == 0))
+        if len(tight) != 0:
+            owner[tight[0] + 1] = row
+        else:
+            unmatched.append(row)
+
+    for row in unmatched:
+        owner[0] = row
+        column = 0
+        min_slack = np.full(columns + 1, np.inf)
+        used = np.zeros(columns + 1, dtype=bool)
+
+        # grow a shortest path tree until it reaches a free column
+        while True:
+            used[column] = True
+            current_row = owner[column]
+            free = ~used
+            slack = (cost[current_row - 1]
+                     - row_potential[current_row] - column_potential[1:])
+            better = free[1:] & (slack < min_slack[1:])
+            min_slack[1:][better] = slack[better]
+            way[1:][better] = column
+
+            candidates = np.where(free, min_slack, np.inf)
+            next_column = int(np.argmin(candidates))
+            delta = candidates[next_column]
+
+            row_potential[owner[used]] += delta
+            column_potential[used] -= delta
+            min_slack[free] -= delta
+
+            column = next_column
+            if owner[column] == 0:
+                break
+
+        # flip the matching along the path back to the virtual column
+        while column != 0:
+            previous = way[column]
+            owner[column] = owner[previous]
+            column = previous
+
+    matched = np.zeros(rows, dtype=np.int64)
+    matched[owner[1:][owner[1:] > 0] - 1] = np.flatnonzero(owner[1:] > 0)
+    return matched
@@ -0,0 +1,93 @@
+"""Swap based improvement of an existing assignment of TA's to labs."""
+import time
+import numpy as np
+
+
+def local_search(scores, assignment, time_limit=None, fixed=None):
+    """
+    Improve an assignment by swapping the TA's of labs.
+
+    scores = (TA, lab) score matrix
+    assignment = TA index of every lab, -1 for unassigned labs
+    time_limit = seconds to spend, None to run until no move improves
+    fixed = optional boolean array of labs that must keep their TA
+
+    The best improving 2-swap (two labs trade TA's) is applied until there
+    is none left, then the best 3-cycle (three labs pass their TA's around)
+    is tried before going back to swaps. Every move keeps the number of
+    labs each TA holds, so capacities and contracted TA's are unaffected.
+    Moves are evaluated from a gain matrix instead of rescoring the whole
+    assignment.
+
+    Return the improved assignment.
+    """
+    started = time.monotonic()
+    scores = np.asarray(scores, dtype=np.int64)
+    assignment = np.array(assignment, dtype=np.int64)
+
+    # only assigned labs that are not fixed take part in moves
+    movable = assignment >= 0
+    if fixed is not None:
+        movable &= ~np.asarray(fixed, dtype=bool)
+    labs = np.flatnonzero(movable)
+    if len(labs) < 2:
+        return assignment
+    owner = assignment[labs]
+
+    # held[i, j] = score of lab j for the TA of lab i
+    held = scores[owner][:, labs]
+
+    while time_limit is None or time.monotonic() - started < time_limit:
+        # move[i, j] = gain of lab j going to the TA of lab i
+        current = np.diagonal(held)
+        move = held - current[None, :]
+
+        # a 2-swap of labs i and j moves both of them
+        swap = move + move.T
+        first, second = np.unravel_index(np.argmax(swap), swap.shape)
+        if swap[first, second] > 0:
+            order = [first, second]
+            owner[order] = owner[order[::-1]]
+        else:
+            cycle = _best_cycle(move)
+            if cycle is None:
+                break
+            # each lab of the cycle goes to the TA of the next one
+            owner[cycle] = owner[np.roll(cycle, -1)]
+            order = cycle
+
+        # only the rows of the labs that changed TA's need rescoring
+        held[order] = scores[owner[order]][:, labs]
+
+    assignment[labs] = owner
+    return assignment
+
+
+def _best_cycle(move, chunk=4096):
+    """
+    Find the best improving 3-cycle of labs from the gain matrix.
+
+    A cycle i, j, k gives lab i the TA of lab j, lab j the TA of lab k and
+    lab k the TA of lab i. Any cycle with a positive total can be started
+    at a move with a positive gain, so only those moves are extended.
+
+    Return the labs of the cycle as an array, or None if none improves.
+    """
+    # gain[i, j] = gain of lab i going to the TA of lab j
+    gain = move.T
+    first, second = np.nonzero(gain > 0)
+    best = 0
+    cycle = None
+    for start in range(0, len(first), chunk):
+        i = first[start:start + chunk]
+        j = second[start:start + chunk]
+        # closing the cycle through every possible third lab k
+        total = gain[i, j][:, None] + gain[j, :] + gain[:, i].T
+        rows = np.arange(len(i))
+        total[rows, i] = 0
+        total[rows, j] = 0
+        row, k = np.unravel_index(np.argmax(total), total.shape)
+        if total[row, k] > best:
+            best = total[row, k]
+            cycle = np.array([i[row], j[row], k])
+    return cycle
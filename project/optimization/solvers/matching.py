@@ -0,0 +1,151 @@
+"""Maximum matching of labs to free TA's, to find labs that cannot be covered."""
+import numpy as np
+
+
+def max_matching(feasible, capacity):
+    """
+    Match as many labs as possible to TA's free for them (Hopcroft-Karp).
+
+    feasible = boolean (TA, lab) matrix, True where the TA can take the lab
+    capacity = most labs each TA can be matched to
+
+    A TA taking several labs works like several copies of the TA, without
+    building the copies. Every phase finds the shortest augmenting paths
+    with a breadth first search and follows as many of them as possible,
+    so only O(sqrt(V)) phases are needed.
+
+    Return the TA index of every lab, -1 for labs left unmatched.
+    """
+    feasible = np.asarray(feasible, dtype=bool)
+    capacity = np.asarray(capacity, dtype=np.int64)
+    n_tas, n_labs = feasible.shape
+    neighbours = [np.flatnonzero(feasible[:, lab]) for lab in range(n_labs)]
+
+    # start from a quick greedy matching
+    owner = np.full(n_labs, -1, dtype=np.int64)
+    load = np.zeros(n_tas, dtype=np.int64)
+    held = [[] for ta in range(n_tas)]
+    for lab in range(n_labs):
+        free = neighbours[lab][load[neighbours[lab]] < capacity[neighbours[lab]]]
+        if len(free):
+            owner[lab] = free[0]
+            load[free[0]] += 1
+            held[free[0]].append(lab)
+
+    while True:
+        lab_layer, ta_layer, last = _layers(feasible, capacity, owner, load,
+                                            stop_at_free=True)
+        if last is None:
+            return owner
+        for root in np.flatnonzero(owner < 0):
+            if lab_layer[root] == 0:
+                _augment(root, neighbours, owner, load, held, capacity,
+                         lab_layer, ta_layer, last)
+
+
+def hall_violator(feasible, capacity, owner):
+    """
+    Find the labs a maximum matching cannot cover and the TA's they share.
+
+    owner = maximum matching, see max_matching
+
+    Following alternating paths from the unmatched labs reaches a set of
+    labs whose free TA's cannot take them all, which is what keeps them
+    from being covered (Hall's condition).
+
+    Return the lab indices and TA indices of that set.
+    """
+    feasible = np.asarray(feasible, dtype=bool)
+    capacity = np.asarray(capacity, dtype=np.int64)
+    load = np.bincount(owner[owner >= 0], minlength=feasible.shape[0])
+    lab_layer, ta_layer, last = _layers(feasible, capacity, owner, load,
+                                        stop_at_free=False)
+    return (np.flatnonzero(lab_layer >= 0), np.flatnonzero(ta_layer >= 0))
+
+
+def _layers(feasible, capacity, owner, load, stop_at_free):
+    """
+    Breadth first search over alternating paths from the unmatched labs.
+
+    Labs reach every TA free for them, TA's reach the labs matched to them.
+    Return the layer of every lab and TA (-1 if not reached) and the layer
+    of the first TA's with room left, None if no TA with room was reached.
+    With stop_at_free the search ends at that layer.
+    """
+    n_tas, n_labs = feasible.shape
+    lab_layer = np.full(n_labs, -1, dtype=np.int64)
+    ta_layer = np.full(n_tas, -1, dtype=np.int64)
+    frontier = np.flatnonzero(owner < 0)
+    lab_layer[frontier] = 0
+
+    layer = 0
+    last = None
+    while len(frontier):
+        tas = np.flatnonzero(feasible[:, frontier].any(axis=1)
+                             & (ta_layer < 0))
+        if not len(tas):
+            break
+        ta_layer[tas] = layer
+        if (load[tas] < capacity[tas]).any():
+            last = layer
+            if stop_at_free:
+                break
+        frontier = np.flatnonzero(np.isin(owner, tas) & (lab_layer < 0))
+        layer += 1
+        lab_layer[frontier] = layer
+    return lab_layer, ta_layer, last
+
+
+def _augment(root, neighbours, owner, load, held, capacity,
+             lab_layer, ta_layer, last):
+    """
+    Follow a shortest augmenting path from an unmatched lab, if any is left.
+
+    Each lab on the path moves to the TA of the next layer and the TA at
+    the end takes one more lab. Labs the search gets stuck on are dropped
+    from their layer so later searches of the phase skip them.
+    """
+    def steps(lab):
+        # (TA, lab the TA gives up) moves out of a lab, None ending the path
+        for ta in neighbours[lab]:
+            if ta_layer[ta] != lab_layer[lab]:
+                continue
+            if ta_layer[ta] == last:
+                if load[ta] < capacity[ta]:
+                    yield ta, None
+                continue
+            for given_up in list(held[ta]):
+                if lab_layer[given_up] == lab_layer[lab] + 1:
+                    yield ta, given_up
+
+    path = [root]
+    choices = []
+    searches = [steps(root)]
+    while searches:
+        step = next(searches[-1], None)
+        if step is None:
+            # dead end, nothing more to find through this lab
+            lab_layer[path.pop()] = -1
+            searches.pop()
+            if choices:
+                choices.pop()
+            continue
+
+        ta, given_up = step
+        choices.append(ta)
+        if given_up is None:
+            break
+        path.append(given_up)
+        searches.append(steps(given_up))
+    else:
+        return False
+
+    # every lab of the path moves to its chosen TA
+    for lab, ta in zip(path, choices):
+        if owner[lab] >= 0:
+            held[owner[lab]].remove(lab)
+        owner[lab] = ta
+        held[ta].append(lab)
+        lab_layer[lab] = -1
+    load[choices[-1]] += 1
+    return True
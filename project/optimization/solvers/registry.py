@@ -0,0 +1,87 @@
+"""Named assignment engines and the problem they all work on."""
+import numpy as np
+
+
+class Problem:
+    """
+    An assignment problem, as arrays.
+
+    scores = (TA, lab) score matrix, one column per lab
+    contracted = boolean array, True for contracted TA's
+    capacity = most labs each TA can be assigned to
+    """
+
+    __slots__ = ('scores', 'contracted', 'capacity')
+
+    def __init__(self, scores, contracted, capacity):
+        self.scores = np.asarray(scores)
+        self.contracted = np.asarray(contracted, dtype=bool)
+        self.capacity = np.asarray(capacity, dtype=np.int64)
+
+    @property
+    def shape(self):
+        """Return the number of TA's and labs."""
+        return self.scores.shape
+
+    def subset(self, tas, labs):
+        """Return the problem restricted to the given TA and lab indices."""
+        return Problem(self.scores[np.ix_(tas, labs)], self.contracted[tas],
+                       self.capacity[tas])
+
+
+class Engine:
+    """A named assignment engine, see register()."""
+
+    __slots__ = ('name', 'label', 'function')
+
+    def __init__(self, name, label, function):
+        self.name = name
+        self.label = label
+        self.function = function
+
+    def __call__(self, problem, time_budget=None):
+        """
+        Solve a problem.
+
+        time_budget = seconds the engine may spend, engines that always
+                      finish quickly ignore it
+
+        Return the TA index of every lab (-1 for unassigned labs) and
+        whether the assignment is proven optimal.
+        """
+        return self.function(problem, time_budget)
+
+    def __reduce__(self):
+        # engines are sent to worker processes by name
+        return (get_engine, (self.name,))
+
+
+ENGINES = {}
+
+
+def register(name, label):
+    """
+    Register an engine function under a name.
+
+    The function takes a Problem and a time budget and returns an
+    assignment array and whether it is proven optimal. label is the name
+    shown to the LO.
+    """
+    def decorator(function):
+        ENGINES[name] = Engine(name, label, function)
+        return function
+    return decorator
+
+
+def get_engine(name):
+    """Return the engine registered under a name, raise ValueError if none."""
+    try:
+        return ENGINES[name]
+    except KeyError:
+        raise ValueError(f'Unknown solver "{name}", choose one of '
+                         f'{", ".join(ENGINES)}') from None
+
+
+def engine_choices():
+    """Return (name, label) pairs of every engine, in registration order."""
+    return [(engine.name, engine.label) for engine in ENGINES.values()]
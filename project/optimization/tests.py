@@ -1,3 +1,361 @@
-from django.test import TestCase
+"""Tests of the assignment solvers and of template versions built on others."""
+import itertools
+from datetime import time
+import numpy as np
+from django.test import SimpleTestCase, TestCase
+from laborganizer.models import Semester, Lab
+from laborganizer.tests import baseline_available
+from laborganizer.time_slots import time_slot_mask
+from teachingassistant.models import TA
+from optimization.models import (TemplateSchedule, InfeasibleScheduleError,
+                                 clear_flattened_assignments,
+                                 clear_score_matrices)
+from optimization.optimization_primary import (CONFLICT_THRESHOLD,
+                                               build_score_matrix)
+from optimization.solvers import (hungarian, min_cost_flow, greedy, anytime,
+                                  max_matching, hall_violator)
 
-# Create your tests here.
+
+def objective(scores, contracted, assignment):
+    """
+    Return what the optimal solvers maximize, in order of priority.
+
+    That is the number of labs covered, the number of labs covered by
+    contracted TA's and the total score.
+    """
+    labs = np.flatnonzero(np.asarray(assignment) >= 0)
+    tas = np.asarray(assignment)[labs]
+    return (len(labs), int(contracted[tas].sum()),
+            int(scores[tas, labs].sum()))
+
+
+def brute_force(scores, contracted, capacity):
+    """Return the best objective of every assignment within capacity."""
+    n_tas, n_labs = scores.shape
+    best = None
+    for assignment in itertools.product(range(-1, n_tas), repeat=n_labs):
+        assignment = np.array(assignment, dtype=np.int64)
+        load = np.bincount(assignment[assignment >= 0], minlength=n_tas)
+        if (load > capacity).any():
+            continue
+        value = objective(scores, contracted, assignment)
+        if best is None or value > best:
+            best = value
+    return best
+
+
+def most_covered(feasible, capacity):
+    """Return the most labs TA's free for them can cover within capacity."""
+    choices = [[-1] + np.flatnonzero(feasible[:, lab]).tolist()
+               for lab in range(feasible.shape[1])]
+    most = 0
+    for assignment in itertools.product(*choices):
+        assignment = np.array(assignment, dtype=np.int64)
+        covered = assignment[assignment >= 0]
+        if (np.bincount(covered, minlength=len(capacity)) <= capacity).all():
+            most = max(most, len(covered))
+    return most
+
+
+def random_problems(count, n_tas=3, n_labs=4, most_labs=2):
+    """
+    Yield small random problems, the same ones on every run.
+
+    Some scores are conflicts, like the ones build_score_matrix gives TA's
+    with a class during a lab.
+    """
+    rng = np.random.default_rng(0)
+    for _ in range(count):
+        scores = rng.integers(-3, 6, size=(n_tas, n_labs))
+        scores[rng.random((n_tas, n_labs)) < 0.2] = -999
+        contracted = rng.random(n_tas) < 0.5
+        capacity = rng.integers(0, most_labs + 1, size=n_tas)
+        yield scores, contracted, capacity
+
+
+def assert_within_capacity(test, assignment, capacity):
+    """Check that no TA holds more labs than their capacity."""
+    load = np.bincount(assignment[assignment >= 0],
+                       minlength=len(capacity))
+    test.assertTrue((load <= capacity).all(), (assignment, capacity))
+
+
+def baseline_score(experience, class_times, lab, priority_bonus):
+    """The original calculate_score(), on plain values."""
+    total_score = 0
+    for subject, catalog_id in experience:
+        if subject == lab.subject and catalog_id == lab.catalog_id:
+            total_score += priority_bonus
+    for days, start, end in class_times:
+        if not baseline_available(lab.days, lab.start_time, lab.end_time,
+                                  days, start, end):
+            total_score -= 999
+    return total_score
+
+
+class ScoreMatrixTests(SimpleTestCase):
+    """Scores of every TA for every lab, against the original rules."""
+
+    def random_times(self, rng, count):
+        """Return count random class or lab times on the 5 minute grid."""
+        days = ['M', 'T', 'W', 'Th', 'F', 'M W', 'T Th', 'M W F']
+        times = []
+        for _ in range(count):
+            start = int(rng.integers(8 * 12, 16 * 12)) * 5
+            length = int(rng.integers(6, 24)) * 5
+            times.append((days[rng.integers(len(days))],
+                          time(start // 60, start % 60),
+                          time((start + length) // 60,
+                               (start + length) % 60)))
+        return times
+
+    def test_same_as_baseline(self):
+        """Every score is the one the original rules gave."""
+        rng = np.random.default_rng(0)
+        courses = ['CS 126', 'CS 249', 'MATH 101']
+        labs = []
+        for index, (days, start, end) in enumerate(
+                self.random_times(rng, 30)):
+            subject, catalog_id = courses[index % 3].split()
+            lab = Lab(subject=subject, catalog_id=catalog_id, days=days,
+                      start_time=start, end_time=end)
+            lab.update_time_slots()
+            labs.append(lab)
+        # the same lab twice, so labs are scored in groups
+        labs += labs[:5]
+
+        tas = []
+        class_times = []
+        for index in range(20):
+            # repeated experience counts once for every entry
+            experience = ','.join(rng.choice(courses + ['CS126'],
+                                             size=index % 4))
+            tas.append(TA(experience=experience))
+            class_times.append(self.random_times(rng, index % 5))
+        tas += tas[:3]
+        class_times += class_times[:3]
+
+        masks = [[time_slot_mask(*class_time) for class_time in times]
+                 for times in class_times]
+        for priority_bonus in (0, 5):
+            scores = build_score_matrix(tas, labs, priority_bonus, 1, masks)
+            expected = [[baseline_score(ta.get_experience(), times, lab,
+                                        priority_bonus) for lab in labs]
+                        for ta, times in zip(tas, class_times)]
+            self.assertEqual(scores.tolist(), expected)
+            self.assertTrue((scores <= -999).any())
+            self.assertEqual((scores > 0).any(), priority_bonus > 0)
+
+
+class HungarianTests(SimpleTestCase):
+    """Rounds of optimal one lab per TA matchings."""
+
+    def test_optimal_with_one_lab_per_ta(self):
+        """With one lab per TA there is a single round, which is optimal."""
+        for scores, contracted, _ in random_problems(40):
+            capacity = np.ones(len(contracted), dtype=np.int64)
+            assignment = hungarian(scores, contracted, capacity)
+            self.assertEqual(objective(scores, contracted, assignment),
+                             brute_force(scores, contracted, capacity))
+
+    def test_every_ta_gets_a_lab_before_a_second(self):
+        """No TA takes a second lab while another TA has room and none."""
+        for scores, contracted, capacity in random_problems(40):
+            assignment = hungarian(scores, contracted, capacity)
+            assert_within_capacity(self, assignment, capacity)
+            load = np.bincount(assignment[assignment >= 0],
+                               minlength=len(capacity))
+            if (load > 1).any():
+                self.assertTrue((load[capacity > 0] > 0).all())
+
+    def test_contracted_first(self):
+        """A contracted TA takes the lab over a higher scoring one."""
+        assignment = hungarian(np.array([[1], [5]]), np.array([True, False]),
+                               np.array([1, 1]))
+        self.assertEqual(assignment.tolist(), [0])
+
+
+class FlowTests(SimpleTestCase):
+    """One optimal solve over every TA's labs."""
+
+    def test_optimal(self):
+        """The objective is the best one of every assignment."""
+        for scores, contracted, capacity in random_problems(60):
+            assignment = min_cost_flow(scores, contracted, capacity)
+            self.assertEqual(objective(scores, contracted, assignment),
+                             brute_force(scores, contracted, capacity))
+
+    def test_within_capacity(self):
+        """No TA is given more labs than their capacity."""
+        for scores, contracted, capacity in random_problems(60, most_labs=3):
+            assert_within_capacity(
+                self, min_cost_flow(scores, contracted, capacity), capacity)
+
+    def test_identical_tas_share_labs(self):
+        """TA's solved as one group are each kept within capacity."""
+        scores = np.array([[4, 4, 4], [4, 4, 4], [1, 1, 1]])
+        assignment = min_cost_flow(scores, np.zeros(3, dtype=bool),
+                                   np.array([2, 1, 2]))
+        self.assertEqual(sorted(assignment.tolist()), [0, 0, 1])
+
+
+class GreedyTests(SimpleTestCase):
+    """The original greedy assignment."""
+
+    def test_within_capacity(self):
+        """No TA is given more labs than their capacity."""
+        for scores, contracted, capacity in random_problems(60, most_labs=3):
+            assert_within_capacity(
+                self, greedy(scores, contracted, capacity), capacity)
+
+    def test_full_ta_skipped_in_first_pass(self):
+        """A top scoring TA without room is not given a lab."""
+        assignment = greedy(np.array([[5, 5], [1, 5]]),
+                            np.zeros(2, dtype=bool), np.array([0, 2]))
+        self.assertEqual(assignment.tolist(), [-1, 1])
+
+    def test_contracted_first(self):
+        """A contracted TA takes the lab over a higher scoring one."""
+        assignment = greedy(np.array([[1], [5]]), np.array([True, False]),
+                            np.array([1, 1]))
+        self.assertEqual(assignment.tolist(), [0])
+
+
+class AnytimeTests(SimpleTestCase):
+    """Improving a greedy assignment until optimal or out of time."""
+
+    def test_optimal_without_budget(self):
+        """Without a time budget it runs until the objective is the best."""
+        for scores, contracted, capacity in random_problems(60):
+            assignment, is_optimal = anytime(scores, contracted, capacity)
+            self.assertTrue(is_optimal)
+            self.assertEqual(objective(scores, contracted, assignment),
+                             brute_force(scores, contracted, capacity))
+
+    def test_valid_when_out_of_time(self):
+        """With no time at all the assignment is still within capacity."""
+        for scores, contracted, capacity in random_problems(60, most_labs=3):
+            assignment, is_optimal = anytime(scores, contracted, capacity, 0)
+            assert_within_capacity(self, assignment, capacity)
+            start = greedy(scores, contracted, capacity)
+            self.assertGreaterEqual(objective(scores, contracted, assignment),
+                                    objective(scores, contracted, start))
+
+
+class MatchingTests(SimpleTestCase):
+    """Covering labs with TA's free for them, and what stops it."""
+
+    def test_maximum(self):
+        """As many labs are matched as any assignment can cover."""
+        for scores, contracted, capacity in random_problems(60):
+            feasible = scores > CONFLICT_THRESHOLD
+            owner = max_matching(feasible, capacity)
+            matched = np.flatnonzero(owner >= 0)
+            self.assertTrue(feasible[owner[matched], matched].all())
+            assert_within_capacity(self, owner, capacity)
+            self.assertEqual(len(matched), most_covered(feasible, capacity))
+
+    def test_hall_violator(self):
+        """Two labs only one TA is free for are found with that TA."""
+        feasible = np.array([[True, True, True], [False, False, True]])
+        capacity = np.array([1, 1])
+        owner = max_matching(feasible, capacity)
+        self.assertEqual(int((owner < 0).sum()), 1)
+        labs, tas = hall_violator(feasible, capacity, owner)
+        self.assertEqual(labs.tolist(), [0, 1])
+        self.assertEqual(tas.tolist(), [0])
+
+    def test_check_coverage(self):
+        """An uncoverable schedule raises, naming the labs and TA's."""
+        scores = np.array([[1, 2, 3], [-999, -999, 3]])
+        with self.assertRaises(InfeasibleScheduleError) as raised:
+            TemplateSchedule().check_coverage(
+                ['first TA', 'second TA'], ['lab 0', 'lab 1', 'lab 2'],
+                scores, np.array([1, 1]))
+        self.assertEqual(raised.exception.labs, ['lab 0', 'lab 1'])
+        self.assertEqual(raised.exception.tas, ['first TA'])
+
+
+class TemplateDeltaTests(TestCase):
+    """Templates storing only what differs from their parent."""
+
+    def setUp(self):
+        # primary keys are reused between tests, so nothing cached is kept
+        clear_flattened_assignments()
+        clear_score_matrices()
+        semester = Semester.objects.create(semester_time='FAL', year=2026)
+        self.labs = [Lab.objects.create(class_name=f'lab {index}',
+                                        subject='CS', catalog_id='126',
+                                        course_id=str(100 + index),
+                                        days='M W',
+                                        start_time=time(8 + index),
+                                        end_time=time(8 + index, 50),
+                                        semester=semester)
+                     for index in range(3)]
+        self.tas = [TA.objects.create(first_name=f'TA {index}',
+                                      last_name='Test',
+                                      student_id=str(500 + index))
+                    for index in range(3)]
+        self.parent = TemplateSchedule.objects.create(version_number=1,
+                                                      semester=semester)
+        self.parent.store_assignments({
+            self.labs[0].pk: (self.tas[0].pk, False, 5),
+            self.labs[1].pk: (self.tas[1].pk, True, 3),
+        })
+        self.child = TemplateSchedule.objects.create(version_number=2,
+                                                     semester=semester,
+                                                     parent=self.parent)
+
+    def assigned(self, template):
+        """Return the TA and pin of every lab assigned in a template."""
+        return {lab_id: (ta_id, pinned) for lab_id, ta_id, pinned
+                in template.assignments.values_list('lab_id', 'ta_id',
+                                                    'pinned')}
+
+    def test_inherits_parent(self):
+        """A child stores nothing until it differs from its parent."""
+        self.assertEqual(self.assigned(self.child),
+                         self.assigned(self.parent))
+        self.assertEqual(self.child.own_assignments.count(), 0)
+
+    def test_edit_parent_flattens_child(self):
+        """Changing a parent leaves its children as they were."""
+        before = self.assigned(self.child)
+        self.parent.assign(self.tas[2], self.labs[0])
+        self.child.refresh_from_db()
+        self.assertIsNone(self.child.parent_id)
+        self.assertEqual(self.assigned(self.child), before)
+        self.assertEqual(self.assigned(self.parent)[self.labs[0].pk],
+                         (self.tas[2].pk, False))
+
+    def test_unassign_in_child(self):
+        """A child can unassign a lab its parent keeps assigned."""
+        self.assertTrue(self.child.unassign(self.labs[0]))
+        self.assertNotIn(self.labs[0].pk, self.assigned(self.child))
+        self.assertIn(self.labs[0].pk, self.assigned(self.parent))
+
+    def test_save_keeps_inherited_pin(self):
+        """Saving a solved assignment only stores the labs that changed."""
+        scores = np.array([[5, 0, 0], [0, 3, 0], [0, 0, 7]])
+        self.child.save_assignment(self.tas, self.labs, np.array([0, 1, 2]),
+                                   np.array([False, True, False]), scores)
+        self.assertEqual(
+            list(self.child.own_assignments.values_list('lab_id', flat=True)),
+            [self.labs[2].pk])
+        self.assertEqual(self.assigned(self.child)[self.labs[1].pk],
+                         (self.tas[1].pk, True))
+
+    def test_flatten(self):
+        """A flattened child reads the same without its parent."""
+        before = self.assigned(self.child)
+        self.child.flatten()
+        self.assertIsNone(self.child.parent_id)
+        self.assertEqual(self.assigned(self.child), before)
+
+    def test_delete_parent(self):
+        """Deleting a parent flattens its children first."""
+        before = self.assigned(self.child)
+        self.parent.delete()
+        self.child.refresh_from_db()
+        self.assertIsNone(self.child.parent_id)
+        self.assertEqual(self.assigned(self.child), before)
@@ -166,6 +166,36 @@ MEDIA_URL = '/media/'
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# number of processes used to score TA's against labs, 1 scores them
+# within the request itself
+SCORING_WORKERS = config('SCORING_WORKERS', default=1, cast=int)
+
+# seconds spent swapping TA's between labs after a schedule is generated,
+# when the LO asks for it
+LOCAL_SEARCH_TIME = config('LOCAL_SEARCH_TIME', default=1.0, cast=float)
+
+# number of processes independent parts of a schedule are solved in, when
+# generating with decompose
+SOLVER_WORKERS = config('SOLVER_WORKERS', default=1, cast=int)
+
+# seconds a solver may spend on a schedule unless the LO picks another time
+# limit, the 'anytime' engine returns the best schedule found by then
+SOLVER_TIME_BUDGET = config('SOLVER_TIME_BUDGET', default=30.0, cast=float)
+
+# seconds a running schedule job may go without progress before it is
+# taken to belong to a crashed worker and failed
+SCHEDULE_JOB_TIMEOUT = config('SCHEDULE_JOB_TIMEOUT', default=1800, cast=int)
+
+# directory the score matrices of templates are cached in as memory mapped
+# files shared by every worker process, empty to always read them from the
+# database
+SCORE_CACHE_DIR = config('SCORE_CACHE_DIR',
+                         default=os.path.join(BASE_DIR, 'cache', 'scores'))
+
+# build every generated template on the most recent one, storing only the
+# assignments and scores that differ from it
+TEMPLATE_DELTAS = config('TEMPLATE_DELTAS', default=True, cast=bool)
+
 LOGIN_URL = 'sign_in'
 LOGIN_REDIRECT_URL = 'sign_in'
 LOGOUT_REDIRECT_URL = 'sign_in'
@@ -6,7 +6,7 @@ from .models import TA, Holds
 class TAAdmin(admin.ModelAdmin):
     """Admin configuration display."""
 
-    list_display = ['__str__', 'student_id', 'year']
+    list_display = ['__str__', 'student_id', 'year', 'max_labs']
     list_filter = ['year']
     exclude = ['holds_key', 'availability_key', 'scores']
     readonly_fields = ['year',
@@ -0,0 +1,18 @@
+# Generated by Django 4.0.1 on 2026-10-18 18:04
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachingassistant', '0028_classtime_semester_name'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='ta',
+            name='max_labs',
+            field=models.PositiveSmallIntegerField(default=3, verbose_name='Most labs'),
+        ),
+    ]
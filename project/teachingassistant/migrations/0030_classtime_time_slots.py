@@ -0,0 +1,32 @@
+# Generated by Django 4.0.1 on 2026-10-18 18:31
+
+from django.db import migrations, models
+from laborganizer.time_slots import time_slot_mask
+
+
+def fill_time_slots(apps, schema_editor):
+    """Compute the time slot mask of every existing class time."""
+    ClassTime = apps.get_model('teachingassistant', 'ClassTime')
+    class_times = list(ClassTime.objects.all())
+    for class_time in class_times:
+        class_time.time_slots = time_slot_mask(class_time.days,
+                                               class_time.start_time,
+                                               class_time.end_time)
+    ClassTime.objects.bulk_update(class_times, ['time_slots'],
+                                  batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachingassistant', '0029_ta_max_labs'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classtime',
+            name='time_slots',
+            field=models.BinaryField(default=bytes(180), editable=False, verbose_name='Time slots'),
+        ),
+        migrations.RunPython(fill_time_slots, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 4.0.1 on 2026-10-18 19:02
+
+from django.db import migrations, models
+from laborganizer.time_slots import time_slot_columns
+
+
+def fill_slot_columns(apps, schema_editor):
+    """Compute the day mask and slot range of every existing class time."""
+    ClassTime = apps.get_model('teachingassistant', 'ClassTime')
+    class_times = list(ClassTime.objects.all())
+    for class_time in class_times:
+        (_, class_time.day_mask,
+         class_time.first_slot, class_time.last_slot) = time_slot_columns(
+            class_time.days, class_time.start_time, class_time.end_time)
+    ClassTime.objects.bulk_update(class_times,
+                                  ['day_mask', 'first_slot', 'last_slot'],
+                                  batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachingassistant', '0030_classtime_time_slots'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='classtime',
+            name='day_mask',
+            field=models.PositiveSmallIntegerField(default=0, editable=False, verbose_name='Day mask'),
+        ),
+        migrations.AddField(
+            model_name='classtime',
+            name='first_slot',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='First time slot'),
+        ),
+        migrations.AddField(
+            model_name='classtime',
+            name='last_slot',
+            field=models.PositiveSmallIntegerField(blank=True, editable=False, null=True, verbose_name='Last time slot'),
+        ),
+        migrations.AddIndex(
+            model_name='classtime',
+            index=models.Index(fields=['ta', 'first_slot', 'last_slot'], name='teachingass_ta_id_554da9_idx'),
+        ),
+        migrations.RunPython(fill_slot_columns, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 4.0.1 on 2026-10-19 10:00
+
+from django.db import migrations
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('teachingassistant', '0031_classtime_day_mask_classtime_first_slot_and_more'),
+        # the score pairs were copied into score matrices there
+        ('optimization', '0019_scorematrix'),
+    ]
+
+    operations = [
+        migrations.RemoveField(
+            model_name='ta',
+            name='scores',
+        ),
+        migrations.DeleteModel(
+            name='ScorePair',
+        ),
+    ]
@@ -1,27 +1,32 @@
 """Models relating to Teaching Assistants."""
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Exists, F, OuterRef
 from laborganizer.models import Semester
+from laborganizer.time_slots import time_slot_columns, EMPTY_MASK
 
 
-class ScorePair(models.Model):
-    """A score pair representing a course catalog ID and a TA's score."""
+class TAQuerySet(models.QuerySet):
+    """Database side lookups over TA's."""
 
-    def __str__(self):
-        """Define human readable object name."""
-        return f'{self.score_catalog_id}:{self.score}'
-
-    score_catalog_id = models.CharField('Catalog ID for score', max_length=10)
-    score = models.IntegerField('Score')
+    def available_for(self, lab):
+        """
+        Return the TA's with no class time overlapping the given lab.
 
-    # semester this ScorePair is assigned to
-    semester = models.ForeignKey("laborganizer.Semester",
-                                 on_delete=models.CASCADE,
-                                 blank=True,
-                                 null=True)
+        The overlap is worked out by the database from the day masks and
+        time slot ranges, see laborganizer/time_slots.py.
+        """
+        # a lab without days or times cannot overlap anything
+        if not lab.day_mask or lab.first_slot is None:
+            return self.all()
 
-    # key to the schedule this score belongs to
-    schedule_key = models.CharField('Schedule Key', max_length=10,
-                                    blank=True, null=True)
+        conflicts = ClassTime.objects.filter(
+            ta=OuterRef('pk'),
+            first_slot__lte=lab.last_slot,
+            last_slot__gte=lab.first_slot,
+        ).annotate(
+            shared_days=F('day_mask').bitand(lab.day_mask),
+        ).filter(shared_days__gt=0)
+        return self.filter(~Exists(conflicts))
 
 
 class TA(models.Model):
@@ -84,60 +89,23 @@ class TA(models.Model):
 
     def get_assignments_from_template(self, schedule):
         """Get all the labs a TA is assigned to based on a template schedule."""
-        # get the template schedule
-        assignment_list = []
-        for assignment in schedule.assignments.all():
-            if assignment.ta == self:
-                assignment_list.append(assignment.lab)
-        return assignment_list
-
-    def score_exists(self, lab, schedule_key):
-        """
-        Check if a score already exists for a TA for a given lab.
+        assignments = schedule.assignments.filter(ta=self).select_related(
+            'lab').order_by('pk')
+        return [assignment.lab for assignment in assignments]
 
-        If a score exists, return the ScorePair object, otherwise
-        return None.
+    def get_score(self, lab, schedule_key):
         """
-        index = 0
-        for score in self.scores.all():
-            if (score.score_catalog_id == lab.catalog_id and
-                score.semester == lab.semester and
-                int(score.schedule_key) == schedule_key):
-                # found a matching ScorePair
-                return score
-            index += 1
-        # did not find a matching ScorePair
-        return None
+        Get the score of a given lab, if it exits.
 
-    def get_score(self, lab, schedule_key):
-        """Get the score of a given lab, if it exits."""
-        score_pair = self.score_exists(lab, schedule_key)
-        if score_pair is None:
+        Scores are read from the template's ScoreMatrix, which is loaded
+        once per request.
+        """
+        # imported here, optimization.models imports this module
+        from optimization.models import score_matrix_for
+        matrix = score_matrix_for(schedule_key)
+        if matrix is None:
             return None
-        return score_pair.score
-
-    def assign_score(self, score, lab, schedule_key):
-        """Assign a ScorePair object for a given lab."""
-        # if a current ScorePair exists for this lab, update it
-        score_pair = self.score_exists(lab, schedule_key)
-
-        # check if the score exists
-        if score_pair is None:
-            # it does not, create a new ScorePair
-            new_score = ScorePair.objects.create(score_catalog_id=lab.catalog_id,
-                                                 score=score,
-                                                 semester=lab.semester,
-                                                 schedule_key=schedule_key)
-            # save changes to database
-            self.scores.add(new_score)
-            new_score.save()
-        else:
-            # score exists, update it
-            score_pair.score = score
-            score_pair.save()
-
-        # save all ScorePair changes
-        self.save()
+        return matrix.score(self.pk, lab.pk)
 
     def get_experience(self):
         """Return a Python list of tuples of all experience."""
@@ -167,6 +135,7 @@ class TA(models.Model):
                 'start_time': class_time.start_time,
                 'end_time': class_time.end_time,
                 'semester_name': class_time.semester_name,
+                'time_slots': class_time.time_slots,
             }
         return avail
 
@@ -248,6 +217,9 @@ class TA(models.Model):
 
     contracted = models.BooleanField('Contracted', blank=True, null=True)
 
+    # most labs this TA can be assigned to in a single template schedule
+    max_labs = models.PositiveSmallIntegerField('Most labs', default=3)
+
     # stored as a comma delimited list starting with the subject followed by
     # the catalog id, i.e.
     # (CS126, MAT305, CS249)
@@ -262,14 +234,14 @@ class TA(models.Model):
     availability_key = models.IntegerField('Primary Availability key',
                                            blank=True, null=True, unique=True)
 
-    scores = models.ManyToManyField(ScorePair, blank=True)
-
     assigned_semesters = models.ManyToManyField("laborganizer.Semester",
                                                 blank=True)
 
     assigned_labs = models.ManyToManyField("laborganizer.Lab",
                                            blank=True)
 
+    objects = TAQuerySet.as_manager()
+
 
 class ClassTime(models.Model):
     """
@@ -285,6 +257,9 @@ class ClassTime(models.Model):
 
         verbose_name = 'Class Time'
         verbose_name_plural = 'Class Times'
+        indexes = [
+            models.Index(fields=['ta', 'first_slot', 'last_slot']),
+        ]
 
     def __str__(self):
         """Human readable object name."""
@@ -298,6 +273,17 @@ class ClassTime(models.Model):
         """Return a Python list of the days attached to this time."""
         return self.days.split(',')
 
+    def update_time_slots(self):
+        """Recompute the weekly time slots of this class time."""
+        (self.time_slots, self.day_mask,
+         self.first_slot, self.last_slot) = time_slot_columns(
+            self.days, self.start_time, self.end_time)
+
+    def save(self, *args, **kwargs):
+        """Keep the time slots in line with the days and times."""
+        self.update_time_slots()
+        super().save(*args, **kwargs)
+
     # key to TA
     ta = models.ForeignKey(TA, on_delete=models.CASCADE)
 
@@ -309,6 +295,20 @@ class ClassTime(models.Model):
     days = models.CharField('Days', max_length=10, blank=True, null=True)
     semester_name = models.TextField('Semester', blank=True)
 
+    # weekly mask of the time slots these times take up
+    time_slots = models.BinaryField('Time slots', default=EMPTY_MASK,
+                                    editable=False)
+
+    # the same time slots in a form the database can compare
+    day_mask = models.PositiveSmallIntegerField('Day mask', default=0,
+                                                editable=False)
+    first_slot = models.PositiveSmallIntegerField('First time slot',
+                                                  blank=True, null=True,
+                                                  editable=False)
+    last_slot = models.PositiveSmallIntegerField('Last time slot',
+                                                 blank=True, null=True,
+                                                 editable=False)
+
 
 class Availability(models.Model):
     """Object representing a single TA's availability."""
@@ -334,26 +334,29 @@ class Availability(models.Model):
 
     def edit_time(self, time_list, semester_list):
         """Create a new ClassTime object for this TA."""
-        # delete the existing class times, if any
-        self.delete_times()
-
-        semester_index = 0
-        # create new class times for each object
-        for new_time in time_list:
-            # splice the days from the current index
-            days = new_time[2:]
-
-            # join the days list
-            days = ClassTime.join_days(days)
-
-            # create a new class time object and assign it to this field
-            self.class_times.create(start_time=new_time[0],
-                                    end_time=new_time[1],
-                                    days=days,
-                                    semester_name=semester_list[semester_index],
-                                    ta=self.ta)
-
-            semester_index += 1
+        # replace the class times in one transaction, so the TA is rescored
+        # once for the whole edit
+        with transaction.atomic():
+            # delete the existing class times, if any
+            self.delete_times()
+
+            semester_index = 0
+            # create new class times for each object
+            for new_time in time_list:
+                # splice the days from the current index
+                days = new_time[2:]
+
+                # join the days list
+                days = ClassTime.join_days(days)
+
+                # create a new class time object and assign it to this field
+                self.class_times.create(start_time=new_time[0],
+                                        end_time=new_time[1],
+                                        days=days,
+                                        semester_name=semester_list[semester_index],
+                                        ta=self.ta)
+
+                semester_index += 1
 
     def get_class_times(self):
         """Return a list of the TA's class times."""